@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Page Copy Benchmark
+Times the copy stage of the output builder: one insert_pdf call per page
+(the original GUI loop) against one call per run of consecutive pages
+(label_engine.copy_pages), in the real final page order of each manifest.
+Labels are stamped afterwards in both cases; saving is not timed.
+
+Usage:
+    python benchmarks/bench_copy.py [--repeat 3] [pdf ...]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import fitz  # PyMuPDF
+
+from label_engine import (DEFAULT_SKU_MAP, classify_pages, copy_pages, extract_page_skus,
+                          order_pages, page_runs, stamp_labels)
+
+DEFAULT_INPUTS = [os.path.join(ROOT, name) for name in ("input.pdf", "input2.pdf", "input3.pdf")]
+
+
+def copy_per_page(doc, page_order):
+    new_doc = fitz.open()
+    for page_num in page_order:
+        new_doc.insert_pdf(doc, from_page=page_num, to_page=page_num)
+    return new_doc
+
+
+def time_copy(path, copier, final_page_order, repeat):
+    page_order = [page_num for page_num, _ in final_page_order]
+    samples = []
+    for _ in range(repeat):
+        with fitz.open(path) as doc:
+            start = time.perf_counter()
+            new_doc = copier(doc, page_order)
+            stamp_labels(new_doc, final_page_order)
+            samples.append(time.perf_counter() - start)
+            new_doc.close()
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the page copy stage.")
+    parser.add_argument("inputs", nargs="*", default=DEFAULT_INPUTS, help="manifest PDFs")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per copier")
+    args = parser.parse_args()
+
+    print(f"{'file':<14}{'pages':>7}{'runs':>6}{'per-page s':>12}{'per-run s':>11}{'speedup':>9}")
+    for path in args.inputs:
+        with fitz.open(path) as doc:
+            final_page_order = order_pages(classify_pages(extract_page_skus(doc), DEFAULT_SKU_MAP))
+        runs = len(page_runs([page_num for page_num, _ in final_page_order]))
+        per_page = time_copy(path, copy_per_page, final_page_order, args.repeat)
+        per_run = time_copy(path, copy_pages, final_page_order, args.repeat)
+        print(f"{os.path.basename(path):<14}{len(final_page_order):>7}{runs:>6}{per_page:>12.2f}"
+              f"{per_run:>11.2f}{per_page / per_run:>8.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
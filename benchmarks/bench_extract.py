@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Page Extraction Benchmark
+Times each label_engine extraction mode over the bundled manifests, with
+a freshly opened document per run so MuPDF's font and resource caches
+start cold, and checks that every mode classifies pages like "full".
+
+Usage:
+    python benchmarks/bench_extract.py [--repeat 3] [pdf ...]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import fitz  # PyMuPDF
+
+from label_engine import EXTRACT_MODES, extract_page_skus
+
+DEFAULT_INPUTS = [os.path.join(ROOT, name) for name in ("input.pdf", "input2.pdf", "input3.pdf")]
+
+
+def time_mode(path, mode, repeat):
+    samples = []
+    result = None
+    for _ in range(repeat):
+        fitz.TOOLS.store_shrink(100)
+        with fitz.open(path) as doc:
+            start = time.perf_counter()
+            result = extract_page_skus(doc, mode)
+            samples.append(time.perf_counter() - start)
+    return statistics.median(samples), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the page extraction modes.")
+    parser.add_argument("inputs", nargs="*", default=DEFAULT_INPUTS, help="manifest PDFs")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per mode")
+    parser.add_argument("--modes", nargs="+", choices=EXTRACT_MODES, default=list(EXTRACT_MODES))
+    args = parser.parse_args()
+
+    print(f"{'file':<14}{'mode':<10}{'pages':>7}{'ms/page':>10}{'vs full':>9}")
+    for path in args.inputs:
+        baseline_time, baseline = time_mode(path, "full", args.repeat)
+        for mode in args.modes:
+            elapsed, result = (baseline_time, baseline) if mode == "full" else time_mode(path, mode, args.repeat)
+            pages = len(result)
+            note = "" if result == baseline else "  MISMATCH"
+            print(f"{os.path.basename(path):<14}{mode:<10}{pages:>7}{elapsed / pages * 1e3:>10.2f}"
+                  f"{baseline_time / elapsed:>8.1f}x{note}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
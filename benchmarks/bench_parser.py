@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+SKU Parser Microbenchmark
+Times the single-pass parser in label_engine against the original
+line-by-line regex loop from PDFProcessorGUI._process_pdf_thread, on the
+page text of the bundled manifests. Text extraction is done up front and
+not timed.
+
+Usage:
+    python benchmarks/bench_parser.py [--repeat 20] [pdf ...]
+"""
+
+import argparse
+import os
+import re
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import fitz  # PyMuPDF
+
+from label_engine import parse_page_text
+
+DEFAULT_INPUTS = [os.path.join(ROOT, name) for name in ("input.pdf", "input2.pdf", "input3.pdf")]
+
+
+def legacy_parse_page_text(text):
+    """The original per-line parsing loop, minus labels and stats."""
+    lines = text.splitlines()
+    found = []
+    for idx, line in enumerate(lines):
+        sku = None
+        qty = 1
+        sku_match = re.search(r'SKU:\s*([\w\-]+)', line)
+        if sku_match and not sku_match.group(1).endswith('-'):
+            sku = sku_match.group(1)
+            if idx + 1 < len(lines):
+                next_line = lines[idx + 1]
+                qty_match = re.search(r'(\d+)', next_line)
+                if qty_match:
+                    qty = int(qty_match.group(1))
+            found.append((sku, qty))
+        elif "SKU:" in line:
+            sku_prefix = line.strip().replace("SKU:", "").strip()
+            sku_suffix = lines[idx + 1].strip()
+            if sku_prefix and sku_suffix and not sku_prefix.endswith("-") and not sku_suffix.startswith("-"):
+                sku_full = sku_prefix + "-" + sku_suffix
+            else:
+                sku_full = sku_prefix + sku_suffix
+            sku = sku_full.replace(" ", "")
+            if idx + 2 < len(lines):
+                qty_line = lines[idx + 2]
+                qty_match = re.search(r'(\d+)', qty_line)
+                if qty_match:
+                    qty = int(qty_match.group(1))
+            found.append((sku, qty))
+    return found
+
+
+def time_parser(parser, texts, repeat):
+    """Median seconds for one pass of `parser` over all page texts."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for text in texts:
+            parser(text)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Benchmark the SKU text parser.")
+    arg_parser.add_argument("inputs", nargs="*", default=DEFAULT_INPUTS, help="manifest PDFs")
+    arg_parser.add_argument("--repeat", type=int, default=20, help="timed passes per parser")
+    args = arg_parser.parse_args()
+
+    print(f"{'file':<14}{'pages':>7}{'legacy us/page':>16}{'new us/page':>13}{'speedup':>9}")
+    for path in args.inputs:
+        with fitz.open(path) as doc:
+            texts = [page.get_text() for page in doc]
+        if [legacy_parse_page_text(t) for t in texts] != [parse_page_text(t) for t in texts]:
+            print(f"{os.path.basename(path)}: parsers disagree", file=sys.stderr)
+            return 1
+        legacy = time_parser(legacy_parse_page_text, texts, args.repeat)
+        new = time_parser(parse_page_text, texts, args.repeat)
+        pages = len(texts)
+        print(f"{os.path.basename(path):<14}{pages:>7}{legacy / pages * 1e6:>16.1f}"
+              f"{new / pages * 1e6:>13.1f}{legacy / new:>8.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Save Profile Benchmark
+Builds each manifest's output (copy mode, labels stamped) and times
+saving it with every label_engine save profile, reporting save time and
+output bytes against the input size. Generated manifests (see
+generate_manifest.py) show how the profiles scale to dispatch-sized runs.
+
+Usage:
+    python benchmarks/bench_save_profiles.py [--repeat 3] [pdf ...]
+    python benchmarks/bench_save_profiles.py --repeat 1 --synthetic 3000 8000
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import fitz  # PyMuPDF
+
+from generate_manifest import DEFAULT_MIX, DEFAULT_QTY, write_manifest
+from label_engine import (DEFAULT_SKU_MAP, SAVE_PROFILES, classify_pages, copy_pages,
+                          extract_page_skus, order_pages, save_document, stamp_labels)
+
+DEFAULT_INPUTS = [os.path.join(ROOT, name) for name in ("input.pdf", "input2.pdf", "input3.pdf")]
+
+
+def time_save(doc, final_page_order, profile, output_path, repeat):
+    samples = []
+    for _ in range(repeat):
+        new_doc = copy_pages(doc, [page_num for page_num, _ in final_page_order])
+        stamp_labels(new_doc, final_page_order)
+        start = time.perf_counter()
+        save_document(new_doc, output_path, profile)
+        samples.append(time.perf_counter() - start)
+        new_doc.close()
+    return statistics.median(samples), os.path.getsize(output_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the output save profiles.")
+    parser.add_argument("inputs", nargs="*", default=DEFAULT_INPUTS, help="manifest PDFs")
+    parser.add_argument("--repeat", type=int, default=3, help="timed saves per profile")
+    parser.add_argument("--synthetic", type=int, nargs="*", default=[], metavar="PAGES",
+                        help="also run on generated manifests of these page counts")
+    args = parser.parse_args()
+
+    print(f"{'file':<22}{'pages':>7}{'profile':>10}{'save s':>8}{'MB out':>9}{'MB in':>8}{'out/in':>8}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        inputs = list(args.inputs)
+        for pages in args.synthetic:
+            path = os.path.join(tmp_dir, f"synthetic_{pages}.pdf")
+            write_manifest(path, pages, DEFAULT_MIX, DEFAULT_QTY)
+            inputs.append(path)
+        for path in inputs:
+            input_bytes = os.path.getsize(path)
+            with fitz.open(path) as doc:
+                final_page_order = order_pages(classify_pages(extract_page_skus(doc), DEFAULT_SKU_MAP))
+                for profile in SAVE_PROFILES:
+                    output_path = os.path.join(tmp_dir, f"{profile}.pdf")
+                    elapsed, output_bytes = time_save(doc, final_page_order, profile, output_path,
+                                                      args.repeat)
+                    print(f"{os.path.basename(path):<22}{len(doc):>7}{profile:>10}{elapsed:>8.2f}"
+                          f"{output_bytes / 1e6:>9.2f}{input_bytes / 1e6:>8.2f}"
+                          f"{output_bytes / input_bytes:>8.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Startup Benchmark
+Measures how long the GUI takes to come up: the import time of each
+module on the way to the first window, each in a fresh interpreter, and
+the time from launch until the Tk root is created, the window is drawn
+and the worker process has loaded the engine (through pdf_gui's startup
+probe, see STARTUP_PROBE_ENV), and until the process exits. The launch
+command can be a packaged build, so the same numbers can be taken for a
+PyInstaller bundle. Without a display tk.Tk() fails, so only the time to
+tk.Tk() and to the exit are reported.
+
+Usage:
+    python benchmarks/bench_startup.py [--repeat 5] [--json startup_results.json]
+    python benchmarks/bench_startup.py --no-imports --command dist/PDF_Label_Processor/PDF_Label_Processor
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from pdf_gui import STARTUP_PROBE_ENV
+
+# Modules on the way to the first window, and the engine for comparison
+IMPORT_MODULES = ("tkinter", "tkinter.ttk", "multiprocessing", "engine_settings", "job_worker", "pdf_gui",
+                  "run_gui", "fitz", "label_engine")
+
+# Seconds to wait for a launched GUI to report before giving up
+LAUNCH_TIMEOUT = 60
+
+# Launch times reported: to tk.Tk(), the drawn window, the loaded engine
+# and the process exit (after closing, when there is a display)
+LAUNCH_TIMES = ("tk", "window", "engine_ready", "exit")
+
+IMPORT_SNIPPET = ("import sys, time; start = time.perf_counter(); __import__(sys.argv[1]); "
+                  "print(time.perf_counter() - start)")
+
+
+def import_seconds(module):
+    out = subprocess.run([sys.executable, "-c", IMPORT_SNIPPET, module], cwd=ROOT,
+                         capture_output=True, text=True, check=True).stdout
+    return float(out)
+
+
+def launch_seconds(command, tmp_dir):
+    """Seconds from launch to each probe time and to the process exit."""
+    probe_path = os.path.join(tmp_dir, "probe.json")
+    if os.path.exists(probe_path):
+        os.remove(probe_path)
+    env = dict(os.environ, **{STARTUP_PROBE_ENV: probe_path})
+    start = time.time()
+    process = subprocess.run(command, cwd=ROOT, env=env, capture_output=True, text=True,
+                             timeout=LAUNCH_TIMEOUT)
+    times = {"exit": time.time()}
+    if os.path.exists(probe_path):
+        with open(probe_path, 'r', encoding='utf-8') as f:
+            times.update(json.load(f))
+    if "window" not in times:
+        print(f"  no window (exit code {process.returncode}): "
+              f"{process.stderr.strip().splitlines()[-1] if process.stderr.strip() else 'no output'}")
+    return {name: at - start for name, at in times.items()}
+
+
+def summarize(samples):
+    return {
+        "median": round(statistics.median(samples), 4),
+        "min": round(min(samples), 4),
+        "max": round(max(samples), 4),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark import times and time to the first GUI window.")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per measurement")
+    parser.add_argument("--command", nargs="+", default=[sys.executable, os.path.join(ROOT, "pdf_gui.py")],
+                        help="how to launch the GUI (default: pdf_gui.py with this interpreter)")
+    parser.add_argument("--no-imports", dest="imports", action="store_false",
+                        help="skip the import times, e.g. when timing a packaged build")
+    parser.add_argument("--json", default="startup_results.json", help="where to write the results")
+    args = parser.parse_args()
+
+    results = {"imports": {}, "launch": None}
+    print(f"{'':<20}{'median ms':>10}{'min ms':>8}")
+    for module in IMPORT_MODULES if args.imports else ():
+        result = summarize([import_seconds(module) for _ in range(args.repeat)])
+        results["imports"][module] = result
+        print(f"{module:<20}{result['median'] * 1000:>10.0f}{result['min'] * 1000:>8.0f}")
+
+    print(f"\nLaunching: {' '.join(args.command)}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        runs = [launch_seconds(args.command, tmp_dir) for _ in range(args.repeat)]
+    results["launch"] = {"command": args.command}
+    for name in LAUNCH_TIMES:
+        if all(name in run for run in runs):
+            results["launch"][name] = summarize([run[name] for run in runs])
+            print(f"{name:<20}{results['launch'][name]['median'] * 1000:>10.0f}"
+                  f"{results['launch'][name]['min'] * 1000:>8.0f}")
+
+    with open(args.json, 'w', encoding='utf-8') as f:
+        json.dump({"environment": {"date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                                   "python": platform.python_version(), "platform": platform.platform()},
+                   "results": results}, f, indent=2)
+    print(f"Results written to {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+Benchmark Suite
+Runs the whole pipeline over the bundled manifests, scaled-up copies of
+them and generated manifests (see generate_manifest.py), for the original GUI loop (one insert_pdf per page), the
+rearrage_fast.py range-batching path and the label engine's modes. Each
+run happens in a fresh process; the suite reports median and 90th
+percentile times per stage, peak RSS and output size, and writes
+everything as JSON so results can be compared across versions.
+
+Usage:
+    python benchmarks/bench_suite.py [--scale 1 4] [--synthetic 10000] [--repeat 3]
+                                     [--cases engine legacy-gui] [--json bench_results.json] [pdf ...]
+"""
+
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import fitz  # PyMuPDF
+
+from bench_parser import legacy_parse_page_text
+from generate_manifest import DEFAULT_MIX, DEFAULT_QTY, write_manifest
+from label_engine import DEFAULT_SKU_MAP, SPECIAL_SKUS, classify_pages, order_pages, process_pdf
+from run_report import RunReport
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+DEFAULT_INPUTS = [os.path.join(ROOT, name) for name in ("input.pdf", "input2.pdf", "input3.pdf")]
+DEFAULT_SCALES = (1, 4)
+
+# The original save options of both legacy paths
+LEGACY_SAVE_OPTIONS = {"deflate": False, "garbage": 1, "clean": True}
+
+
+def legacy_gui(input_path, output_path):
+    """The original PDFProcessorGUI loop: get_text, regex parse, one insert_pdf per page."""
+    report = RunReport(input_path, output_path)
+    with report.stage("open"):
+        doc = fitz.open(input_path)
+    texts = []
+    with report.stage("extract", len(doc)):
+        for page in doc:
+            texts.append(page.get_text())
+    with report.stage("parse", len(doc)):
+        page_skus = [legacy_parse_page_text(text) for text in texts]
+    with report.stage("classify", len(doc)):
+        final_page_order = order_pages(classify_pages(page_skus, DEFAULT_SKU_MAP))
+    new_doc = fitz.open()
+    copy_seconds = stamp_seconds = 0.0
+    labels = 0
+    for page_num, label_text in final_page_order:
+        start = time.perf_counter()
+        new_doc.insert_pdf(doc, from_page=page_num, to_page=page_num)
+        copied = time.perf_counter()
+        if label_text is not None:
+            new_doc[-1].insert_text(fitz.Point(5, 250), label_text,
+                                    fontname="Courier-Bold", fontsize=12, color=(0, 0, 0))
+            labels += 1
+        copy_seconds += copied - start
+        stamp_seconds += time.perf_counter() - copied
+    report.add("copy", copy_seconds, len(final_page_order))
+    report.add("stamp", stamp_seconds, labels)
+    with report.stage("save", len(new_doc)):
+        new_doc.save(output_path, **LEGACY_SAVE_OPTIONS)
+    new_doc.close()
+    doc.close()
+    report.finish(len(final_page_order), os.path.getsize(output_path))
+    return report.to_dict()
+
+
+def rearrage_fast(input_path, output_path):
+    """rearrage_fast.py: unmarked pages copied in ranges, marked pages one by one at the end."""
+    report = RunReport(input_path, output_path)
+    with report.stage("open"):
+        doc = fitz.open(input_path)
+    texts = []
+    with report.stage("extract", len(doc)):
+        for page in doc:
+            texts.append(page.get_text())
+    with report.stage("parse", len(doc)):
+        page_skus = [legacy_parse_page_text(text) for text in texts]
+    with report.stage("classify", len(doc)):
+        marked_pages, unmarked_pages = [], []
+        for i, skus in enumerate(page_skus):
+            labels = []
+            for sku, qty in skus:
+                product_name = DEFAULT_SKU_MAP.get(sku, "Unknown Product")
+                if qty > 1 or sku != SPECIAL_SKUS[0]:
+                    labels.append(f"→ {product_name}x{qty}" if qty > 1 else f"→ {product_name}")
+            if labels:
+                marked_pages.append((i, " | ".join(labels)))
+            else:
+                unmarked_pages.append(i)
+        page_ranges = []
+        for page_num in unmarked_pages:
+            if page_ranges and page_num == page_ranges[-1][1] + 1:
+                page_ranges[-1][1] = page_num
+            else:
+                page_ranges.append([page_num, page_num])
+    new_doc = fitz.open()
+    copy_seconds = stamp_seconds = 0.0
+    start = time.perf_counter()
+    for first, last in page_ranges:
+        new_doc.insert_pdf(doc, from_page=first, to_page=last)
+    copy_seconds += time.perf_counter() - start
+    for page_num, label_text in marked_pages:
+        start = time.perf_counter()
+        new_doc.insert_pdf(doc, from_page=page_num, to_page=page_num)
+        copied = time.perf_counter()
+        new_doc[-1].insert_text(fitz.Point(5, 250), label_text,
+                                fontname="Courier-Bold", fontsize=12, color=(1, 0, 0))
+        copy_seconds += copied - start
+        stamp_seconds += time.perf_counter() - copied
+    report.add("copy", copy_seconds, len(doc))
+    report.add("stamp", stamp_seconds, len(marked_pages))
+    with report.stage("save", len(new_doc)):
+        new_doc.save(output_path, **LEGACY_SAVE_OPTIONS)
+    new_doc.close()
+    doc.close()
+    report.finish(len(page_skus), os.path.getsize(output_path))
+    return report.to_dict()
+
+
+def engine(**options):
+    def run(input_path, output_path):
+        summary = process_pdf(input_path, output_path, log=lambda message: None, **options)
+        return summary["report"]
+    return run
+
+
+def engine_page_cache(input_path, output_path):
+    # One cache per workload in the run's temp directory, next to the output:
+    # cold on the first run, warm on the later ones
+    name = os.path.splitext(os.path.basename(input_path))[0]
+    cache_path = os.path.join(os.path.dirname(output_path), f"{name}_pages.sqlite")
+    return engine(page_cache=cache_path)(input_path, output_path)
+
+
+CASES = {
+    "legacy-gui": legacy_gui,
+    "rearrage-fast": rearrage_fast,
+    "engine": engine(),
+    "engine-full-extract": engine(extract_mode="full"),
+    "engine-select": engine(output_mode="select"),
+    "engine-balanced-save": engine(save_profile="balanced"),
+    "engine-compact-save": engine(save_profile="compact"),
+    "engine-label-layer": engine(label_layer="on"),
+    "engine-parallel": engine(workers=os.cpu_count() or 1),
+    "engine-streaming": engine(streaming=True),
+    "engine-page-cache": engine_page_cache,
+}
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return round(peak / (1e6 if sys.platform == "darwin" else 1e3), 1)
+
+
+def run_case(case, input_path, output_path):
+    # Runs in a fresh worker process
+    report = CASES[case](input_path, output_path)
+    report["peak_rss_mb"] = peak_rss_mb()
+    return report
+
+
+def run_isolated(case, input_path, output_path):
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+        return pool.submit(run_case, case, input_path, output_path).result()
+
+
+def scaled_copy(input_path, scale, directory):
+    """Write the manifest repeated `scale` times, each repetition with its own objects."""
+    if scale == 1:
+        return input_path
+    name = os.path.splitext(os.path.basename(input_path))[0]
+    path = os.path.join(directory, f"{name}_x{scale}.pdf")
+    with fitz.open(input_path) as src, fitz.open() as doc:
+        for _ in range(scale):
+            doc.insert_pdf(src)
+        doc.save(path, garbage=1)
+    return path
+
+
+def percentile(samples, q):
+    """Nearest-rank percentile."""
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+
+def summarize(samples):
+    return {
+        "median": round(statistics.median(samples), 4),
+        "p90": round(percentile(samples, 90), 4),
+        "min": round(min(samples), 4),
+        "max": round(max(samples), 4),
+    }
+
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = ""
+    return {
+        "commit": commit,
+        "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "pymupdf": fitz.VersionBind,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the whole pipeline and its stages.")
+    parser.add_argument("inputs", nargs="*", default=DEFAULT_INPUTS, help="manifest PDFs")
+    parser.add_argument("--scale", type=int, nargs="+", default=list(DEFAULT_SCALES),
+                        help="also run on each manifest repeated this many times (default: 1 4)")
+    parser.add_argument("--synthetic", type=int, nargs="*", default=[], metavar="PAGES",
+                        help="also run on generated manifests of these page counts")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per case and input")
+    parser.add_argument("--cases", nargs="+", choices=sorted(CASES), default=list(CASES),
+                        help="pipelines to run (default: all)")
+    parser.add_argument("--json", default="bench_results.json", help="where to write the results")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        print(f"{'case':<22}{'input':<20}{'pages':>7}{'median s':>10}{'p90 s':>8}"
+              f"{'pages/s':>9}{'RSS MB':>8}{'MB out':>8}")
+        # (input name, scale, label, path) of each workload
+        workloads = []
+        for input_path in args.inputs:
+            for scale in args.scale:
+                name = os.path.basename(input_path)
+                workloads.append((name, scale, name + (f" x{scale}" if scale > 1 else ""),
+                                  scaled_copy(input_path, scale, tmp_dir)))
+        for pages in args.synthetic:
+            path = os.path.join(tmp_dir, f"synthetic_{pages}.pdf")
+            write_manifest(path, pages, DEFAULT_MIX, DEFAULT_QTY)
+            workloads.append((os.path.basename(path), 1, os.path.basename(path), path))
+
+        for input_name, scale, label, path in workloads:
+            for case in args.cases:
+                output_path = os.path.join(tmp_dir, f"{case}.pdf")
+                runs = [run_isolated(case, path, output_path) for _ in range(args.repeat)]
+                totals = [run["total_seconds"] for run in runs]
+                stage_names = [stage["stage"] for stage in runs[0]["stages"]]
+                result = {
+                    "case": case,
+                    "input": input_name,
+                    "scale": scale,
+                    "pages": runs[0]["pages"],
+                    "repeat": args.repeat,
+                    "total_seconds": summarize(totals),
+                    "stages": {
+                        name: summarize([next(s["seconds"] for s in run["stages"] if s["stage"] == name)
+                                         for run in runs])
+                        for name in stage_names
+                    },
+                    "peak_rss_mb": max(run["peak_rss_mb"] or 0 for run in runs) or None,
+                    "bytes_written": runs[0]["bytes_written"],
+                }
+                results.append(result)
+                median = result["total_seconds"]["median"]
+                print(f"{case:<22}{label:<20}{result['pages']:>7}{median:>10.2f}"
+                      f"{result['total_seconds']['p90']:>8.2f}{result['pages'] / median:>9.0f}"
+                      f"{result['peak_rss_mb'] or 0:>8.0f}{result['bytes_written'] / 1e6:>8.2f}")
+
+    with open(args.json, 'w', encoding='utf-8') as f:
+        json.dump({"environment": environment(), "results": results}, f, indent=2)
+    print(f"Results written to {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,373 @@
+#!/usr/bin/env python3
+"""
+Synthetic Manifest Generator
+Writes Shiprocket-style 4x6" label PDFs of any size, laid out like the
+real manifests: every page draws one form XObject (/TPLn) listed in a
+resource dictionary shared by all pages, each form has its own font and
+image objects, and the product table has "SKU:" lines (long SKUs wrapped
+as 'TS-NLT5-' / 'CZ47'), quantity cells and, for orders spread over two
+pages, a first page without any SKU. The same seed gives the same file.
+--verify reads it back with the extract modes, along with a few pages
+the content reader once misread (see regression_pages).
+
+Usage:
+    python benchmarks/generate_manifest.py --pages 10000 -o manifest_10k.pdf
+    python benchmarks/generate_manifest.py --pages 1000 --sku-map sku_database.json --verify content full
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from label_engine import EXTRACT_MODES, PageSkus
+
+# Share of product lines per SKU, roughly as in the bundled manifests;
+# SKUs of other maps are equally likely unless --mix is given
+DEFAULT_MIX = {"TN0001": 80, "TS-NLT5-CZ47": 8, "TN0002": 5, "TN003": 4, "84-HNM4-WOND": 3}
+DEFAULT_QTY = {1: 92, 2: 6, 3: 1.5, 4: 0.5}
+
+PAGE_WIDTH, PAGE_HEIGHT = 288, 432
+# Objects per page: page, contents, form, 5 fonts, barcode and logo images
+OBJECTS_PER_PAGE = 10
+FIRST_PAGE_OBJECT = 4
+FONTS = [("F1", "Times-Roman"), ("F2", "Times-Italic"), ("F3", "Times-Roman"),
+         ("F4", "Times-Bold"), ("F5", "Times-Bold")]
+
+# Product table geometry of the real labels (PDF units, y going up)
+TABLE_TOP = 146.625
+ROW_HEIGHT = 26.638
+TABLE_COLUMNS = [("Product Name &", 11.779, 157.498), ("SKU", 29.397, 149.479), ("HSN", 75.320, 153.489),
+                 ("Qty", 95.024, 153.489), ("Unit Price", 116.743, 153.489),
+                 ("Taxable Value", 152.158, 153.489), ("IGST", 205.744, 153.489),
+                 ("Total", 233.270, 153.489)]
+PRICE_COLUMNS = (127.611, 175.412, 206.689, 261.562)
+UNIT_PRICES = {"TN0001": 299.00, "TN0002": 249.00, "TN003": 239.00}
+
+NAMES = ["Vimala Devi", "Raghava Kolli", "Venkatesh .", "Vicky N", "R Ganesan", "Anitha S",
+         "Mohammed Irfan", "Priya Raman", "Suresh Kumar", "Lakshmi Narayanan"]
+STREETS = ["W2 2a Ramanathapuram Salaiputhur", "69a/122, North Street", "Om Sai Agencies, 3/3",
+           "12, Gandhi Road", "Plot 7, Second Cross Street", "Near Bus Stand, Main Road"]
+CITIES = [("Erode, Tamil Nadu, India", "638151"), ("Guntur, Andhra Pradesh, India", "522001"),
+          ("Salem, Tamil Nadu, India", "637107"), ("MADURAI, TAMIL NADU, IN", "625003"),
+          ("Malkangiri, Odisha, India", "764048"), ("Bengaluru, Karnataka, India", "560034")]
+COURIERS = [("Delhivery Surface", "1904177"), ("Bluedart Surface - Select 500gm", "7651116")]
+
+# The same "Powered By" logo is embedded again on every page, as in the real files
+LOGO_SIZE = (147, 35)
+LOGO = zlib.compress(bytes((x * 7 + y * 13) % 256 for y in range(LOGO_SIZE[1]) for x in range(LOGO_SIZE[0])))
+BARCODE_SIZE = (445, 20)
+
+
+def weights_from_args(items: Optional[List[str]], default: Dict) -> Dict:
+    """Parse KEY=WEIGHT arguments (--mix TN0001=80 TN0002=5)."""
+    if not items:
+        return default
+    weights = {}
+    for item in items:
+        key, _, weight = item.partition("=")
+        weights[key] = float(weight)
+    return weights
+
+
+def _escape(text: str) -> bytes:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)").encode("latin-1")
+
+
+def _text(x: float, y: float, font: str, size: float, text: str) -> bytes:
+    return b"BT %.3f %.3f Td /%s %.1f Tf  [(%s)] TJ ET\n" % (x, y, font.encode(), size, _escape(text))
+
+
+def _barcode(digits: str) -> bytes:
+    """A deterministic bar pattern for the AWB number, as a gray image."""
+    width, height = BARCODE_SIZE
+    bits = "".join(format(int(digit), "04b") for digit in digits)
+    row = bytes(0 if bits[x * len(bits) // width] == "1" else 255 for x in range(width))
+    return zlib.compress(row * height)
+
+
+class ManifestWriter:
+    """Writes the PDF objects of a synthetic manifest straight to a file."""
+
+    def __init__(self, f):
+        self.f = f
+        self.offsets: Dict[int, int] = {}
+        f.write(b"%PDF-1.7\n%\xe2\xe3\xcf\xd3\n")
+
+    def object(self, number: int, body: bytes, stream: Optional[bytes] = None):
+        self.offsets[number] = self.f.tell()
+        self.f.write(b"%d 0 obj\n" % number)
+        if stream is None:
+            self.f.write(body + b"\nendobj\n")
+        else:
+            self.f.write(body[:-2] + b"/Length %d>>\nstream\n" % len(stream) + stream + b"\nendstream\nendobj\n")
+
+    def finish(self, root: int):
+        xref_offset = self.f.tell()
+        size = max(self.offsets) + 1
+        self.f.write(b"xref\n0 %d\n0000000000 65535 f \n" % size)
+        for number in range(1, size):
+            self.f.write(b"%010d 00000 n \n" % self.offsets.get(number, 0))
+        self.f.write(b"trailer\n<</Size %d/Root %d 0 R>>\nstartxref\n%d\n%%%%EOF\n" % (size, root, xref_offset))
+
+
+def _order_header(rng: random.Random, order_no: int, total: float) -> Tuple[bytes, str]:
+    courier, awb_prefix = rng.choice(COURIERS)
+    awb = awb_prefix + "%07d" % rng.randrange(10 ** 7)
+    cod = rng.random() < 0.6
+    out = [
+        _text(10.5, 311.585, "F1", 6.8, "Dimensions:"),
+        _text(62.059, 311.585, "F1", 6.8, "20.00*6.50*10.00(cm)"),
+        _text(10.5, 300.566, "F1", 6.8, "Payment:"),
+        _text(62.059, 300.566, "F5", 6.8, "COD" if cod else "PREPAID"),
+        _text(10.5, 289.547, "F1", 6.8, "COD Amount:" if cod else "ORDER TOTAL:"),
+        _text(62.059, 289.547, "F1", 6.8, f"{total:.2f} INR"),
+        _text(10.5, 278.528, "F1", 6.8, "Weight:"),
+        _text(62.059, 278.528, "F1", 6.8, "0.26 kg"),
+        _text(10.5, 267.509, "F1", 6.8, "eWaybill No.:"),
+        _text(62.059, 267.509, "F1", 6.8, "N/A"),
+        _text(153.324, 307.754, "F1", 9.0, f" {courier} "),
+        b"q\n112.500 0 0 30.000 156.375 275.616 cm /I1 Do\nQ\n",
+        _text(194.062, 269.201, "F1", 6.8, awb),
+        _text(147.75, 258.182, "F1", 6.8, " Routing Code: SLE/RGH"),
+        _text(8.25, 234.06, "F4", 7.5, "Shipped By"),
+        _text(49.508, 234.06, "F2", 6.7, "(If undelivered, return to)"),
+        _text(9.0, 224.152, "F3", 7.5, "Tulir Naturals"),
+        _text(8.25, 214.995, "F3", 7.5, "GSTIN: 33CTYPM6749M1ZK"),
+        _text(148.658, 231.81, "F2", 7.5, f"Order #: {order_no} "),
+        _text(146.19, 182.152, "F2", 7.5, f"Invoice No.: Retail{order_no - 4700}"),
+        _text(146.19, 172.995, "F2", 7.5, "Invoice Date: 2025-07-25"),
+    ]
+    return b"".join(out), awb
+
+
+def _product_table(items: List[Tuple[str, int, bool]]) -> bytes:
+    out = [_text(x, y, "F5", 6.8, title) for title, x, y in TABLE_COLUMNS]
+    for row, (sku, qty, split) in enumerate(items):
+        top = TABLE_TOP - row * ROW_HEIGHT
+        out.append(b"6.250 %.3f m 281.625 %.3f l S\n" % (top, top))
+        out.append(_text(8.0, top - 7.73, "F1", 6.8, "N/A "))
+        if split:
+            cut = sku.rindex("-") + 1
+            out.append(_text(8.0, top - 15.765, "F1", 6.8, f"SKU: {sku[:cut]}"))
+            out.append(_text(8.0, top - 23.784, "F1", 6.8, sku[cut:]))
+        else:
+            out.append(_text(8.0, top - 15.765, "F1", 6.8, f"SKU: {sku}"))
+        out.append(_text(98.774, top - 15.724, "F1", 6.8, str(qty)))
+        price = UNIT_PRICES.get(sku, 299.00)
+        taxable = price * qty / 1.12
+        for x, value in zip(PRICE_COLUMNS, (price / 1.12, taxable, taxable * 0.12, price * qty)):
+            out.append(_text(x, top - 15.724, "F1", 6.8, f"{value:.2f}"))
+    return b"".join(out)
+
+
+def _ship_to(rng: random.Random, page_label: str) -> bytes:
+    city, pin = rng.choice(CITIES)
+    lines = [rng.choice(NAMES), rng.choice(STREETS), city, pin]
+    out = [_text(8.25, 417.924, "F4", 7.5, "Ship To ")]
+    out += [_text(9.0, 408.017 - 9.9075 * n, "F3", 7.5, line) for n, line in enumerate(lines)]
+    out += [
+        _text(8.25, 67.674, "F2", 7.5, "All disputes are subject to Tamil Nadu jurisdiction only. "
+                                       "Goods once sold will only "),
+        _text(8.25, 58.516, "F2", 7.5, "be taken back or exchanged as per the store's exchange/return policy."),
+        _text(8.25, 31.137, "F2", 5.2, "THIS IS AN AUTO-GENERATED LABEL AND DOES NOT NEED SIGNATURE."),
+        _text(244.15, 35.985, "F2", 5.2, "Powered By:    "),
+        b"q\n47.250 0 0 11.250 232.500 22.935 cm /I2 Do\nQ\n",
+        _text(144.0, 0.75, "F2", 10.0, page_label),
+    ]
+    return b"".join(out)
+
+
+def generate_pages(page_count: int, sku_weights: Dict[str, float], qty_weights: Dict[int, float],
+                   split_share: float, multi_share: float, continued_share: float,
+                   seed: int = 0):
+    """
+    Yield (form content stream, AWB number, expected SKUs) per page.
+    multi_share of one-page orders have two products; continued_share of
+    orders are spread over two pages, the first of which has no SKU.
+    """
+    rng = random.Random(seed)
+    skus, sku_w = list(sku_weights), list(sku_weights.values())
+    qtys, qty_w = list(qty_weights), list(qty_weights.values())
+
+    def item():
+        sku = rng.choices(skus, sku_w)[0]
+        split = "-" in sku[:-1] and rng.random() < split_share
+        return sku, rng.choices(qtys, qty_w)[0], split
+
+    order_no = 65000
+    produced = 0
+    while produced < page_count:
+        order_no += 1
+        continued = page_count - produced >= 2 and rng.random() < continued_share
+        if continued:
+            items = [item() for _ in range(rng.randint(2, 4))]
+        else:
+            items = [item() for _ in range(2 if rng.random() < multi_share else 1)]
+        total = sum(UNIT_PRICES.get(sku, 299.00) * qty for sku, qty, _ in items)
+        header, awb = _order_header(rng, order_no, total)
+        expected = [(sku, qty) for sku, qty, _ in items]
+        if continued:
+            yield header + _ship_to(rng, "1/2"), awb, []
+            yield _product_table(items) + _ship_to(rng, "2/2"), awb, expected
+            produced += 2
+        else:
+            yield header + _product_table(items) + _ship_to(rng, "1/1"), awb, expected
+            produced += 1
+
+
+def write_manifest(path: str, page_count: int, sku_weights: Dict[str, float],
+                   qty_weights: Dict[int, float], split_share: float = 1.0, multi_share: float = 0.02,
+                   continued_share: float = 0.01, seed: int = 0) -> List[PageSkus]:
+    """Write a synthetic manifest and return the SKU/quantity pairs of each page."""
+    return write_pages(path, generate_pages(page_count, sku_weights, qty_weights, split_share,
+                                            multi_share, continued_share, seed))
+
+
+def write_pages(path: str, pages) -> List[PageSkus]:
+    """Write pages from generate_pages (or alike) and return their SKU/quantity pairs."""
+    expected: List[PageSkus] = []
+    with open(path, 'wb') as f:
+        writer = ManifestWriter(f)
+        logo_w, logo_h = LOGO_SIZE
+        bar_w, bar_h = BARCODE_SIZE
+        for i, (form_stream, awb, page_skus) in enumerate(pages):
+            expected.append(page_skus)
+            base = FIRST_PAGE_OBJECT + i * OBJECTS_PER_PAGE
+            page, contents, form, fonts, barcode, logo = base, base + 1, base + 2, base + 3, base + 8, base + 9
+            writer.object(page, b"<</Type/Page/Parent 3 0 R/MediaBox[0 0 %d %d]/Resources 2 0 R/Contents %d 0 R>>"
+                          % (PAGE_WIDTH, PAGE_HEIGHT, contents))
+            writer.object(contents, b"<<>>", b"2 J\n0.57 w\nq 0 J 1 w 0 j 0 G 0 g 1.0000 0 0 1.0000 0.0000 0.0000 cm "
+                                             b"/TPL%d Do Q\n" % i)
+            font_refs = b"".join(b"/%s %d 0 R" % (name.encode(), fonts + n) for n, (name, _) in enumerate(FONTS))
+            writer.object(form, b"<</Type/XObject/Subtype/Form/FormType 1/BBox[0 0 %d %d]/Filter/FlateDecode"
+                                b"/Resources<</ProcSet[/PDF/Text/ImageB]/Font<<%s>>/XObject<</I1 %d 0 R/I2 %d 0 R>>>>>>"
+                          % (PAGE_WIDTH, PAGE_HEIGHT, font_refs, barcode, logo), zlib.compress(form_stream))
+            for n, (name, base_font) in enumerate(FONTS):
+                writer.object(fonts + n, b"<</Name/%s/Subtype/Type1/Type/Font/BaseFont/%s/Encoding/WinAnsiEncoding>>"
+                              % (name.encode(), base_font.encode()))
+            writer.object(barcode, b"<</Type/XObject/Subtype/Image/Width %d/Height %d/ColorSpace/DeviceGray"
+                                   b"/BitsPerComponent 8/Filter/FlateDecode>>" % (bar_w, bar_h), _barcode(awb))
+            writer.object(logo, b"<</Type/XObject/Subtype/Image/Width %d/Height %d/ColorSpace/DeviceGray"
+                                b"/BitsPerComponent 8/Filter/FlateDecode>>" % (logo_w, logo_h), LOGO)
+
+        count = len(expected)
+        page_refs = b" ".join(b"%d 0 R" % (FIRST_PAGE_OBJECT + i * OBJECTS_PER_PAGE) for i in range(count))
+        # One resource dictionary for all pages, names sorted as in the real files
+        forms = sorted((b"TPL%d" % i, FIRST_PAGE_OBJECT + i * OBJECTS_PER_PAGE + 2) for i in range(count))
+        writer.object(1, b"<</Type/Catalog/Pages 3 0 R>>")
+        writer.object(2, b"<</ProcSet[/PDF/Text/ImageB/ImageC/ImageI]/Font<<>>/XObject<<"
+                      + b"".join(b"/%s %d 0 R" % (name, xref) for name, xref in forms) + b">>>>")
+        writer.object(3, b"<</Type/Pages/Kids[" + page_refs + b"]/Count %d>>" % count)
+        writer.finish(root=1)
+    return expected
+
+
+def regression_pages():
+    """
+    Pages drawn in ways the content reader must not misread, as
+    generate_pages yields them: "SKU:" split over two strings, the same
+    over two text objects, and a kerned "SKU:" after a plain one in the
+    same stream.
+    """
+    header, awb = _order_header(random.Random(0), 65000, 299.00)
+    split = b"BT 8.000 130.860 Td /F1 6.8 Tf (SKU) Tj (: TN0002) Tj ET\n" + _text(8.0, 122.841, "F1", 6.8, "2")
+    yield header + split + _ship_to(random.Random(0), "1/1"), awb, [("TN0002", 2)]
+    # "SKU" is 13.6 units wide in Times-Roman at 6.8, so ": TN0002" follows it on the line
+    split_objects = (b"BT 8.000 130.860 Td /F1 6.8 Tf (SKU) Tj ET\n"
+                     b"BT 21.600 130.860 Td /F1 6.8 Tf (: TN0002) Tj ET\n" + _text(8.0, 122.841, "F1", 6.8, "2"))
+    yield header + split_objects + _ship_to(random.Random(0), "1/1"), awb, [("TN0002", 2)]
+    prices = b"".join(_text(x, 130.901, "F1", 6.8, "249.00") for x in PRICE_COLUMNS)
+    kerned = (_text(8.0, 130.860, "F1", 6.8, "SKU: TN0002") + _text(98.774, 130.901, "F1", 6.8, "1") + prices
+              + b"BT 8.000 104.222 Td /F1 6.8 Tf [(SK)-20(U: TN003)] TJ ET\n"
+              + _text(98.774, 104.263, "F1", 6.8, "1"))
+    yield header + kerned + _ship_to(random.Random(0), "1/1"), awb, [("TN0002", 1), ("TN003", 1)]
+
+
+def _check_pages(path: str, expected: List[PageSkus], mode: str) -> bool:
+    """Read path with one extraction mode and compare with the expected SKUs and page order."""
+    import fitz  # PyMuPDF
+    from label_engine import DEFAULT_SKU_MAP as sku_map, classify_pages, extract_page_skus, order_pages
+
+    start = time.perf_counter()
+    with fitz.open(path) as doc:
+        page_skus = extract_page_skus(doc, mode)
+    seconds = time.perf_counter() - start
+    wrong = [i for i, (got, want) in enumerate(zip(page_skus, expected)) if got != want]
+    same_order = order_pages(classify_pages(page_skus, sku_map)) == order_pages(classify_pages(expected, sku_map))
+    print(f"{mode:<9}{seconds:8.2f} s  {len(wrong)} pages differ, "
+          f"{'same' if same_order else 'DIFFERENT'} page order"
+          + (f" (first: page {wrong[0]})" if wrong else ""))
+    return not wrong and same_order
+
+
+def verify(path: str, expected: List[PageSkus], modes: List[str]) -> bool:
+    """Check that every extraction mode reads the generated SKUs and the regression pages back."""
+    ok = True
+    for mode in modes:
+        ok = _check_pages(path, expected, mode) and ok
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        regression_path = os.path.join(tmp_dir, "regression.pdf")
+        regression = write_pages(regression_path, regression_pages())
+        print("Regression pages:")
+        for mode in modes:
+            ok = _check_pages(regression_path, regression, mode) and ok
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic Shiprocket label manifest.")
+    parser.add_argument("--pages", type=int, default=10000, help="number of pages (default: 10000)")
+    parser.add_argument("-o", "--output", help="PDF to write (default: manifest_<pages>.pdf)")
+    parser.add_argument("--seed", type=int, default=0, help="random seed (default: 0)")
+    parser.add_argument("--sku-map", help="JSON file whose keys are the SKUs to use, "
+                                          "e.g. sku_database.json (default: the built-in SKU map)")
+    parser.add_argument("--mix", nargs="+", metavar="SKU=WEIGHT", help="relative share of each SKU")
+    parser.add_argument("--qty", nargs="+", metavar="QTY=WEIGHT",
+                        help="quantity distribution (default: 1=92 2=6 3=1.5 4=0.5)")
+    parser.add_argument("--split-share", type=float, default=1.0,
+                        help="share of SKUs with a dash drawn wrapped over two lines (default: 1.0)")
+    parser.add_argument("--multi-share", type=float, default=0.02,
+                        help="share of one-page orders with two products (default: 0.02)")
+    parser.add_argument("--continued-share", type=float, default=0.01,
+                        help="share of orders spread over two pages, the first without SKU (default: 0.01)")
+    parser.add_argument("--expected", help="also write the SKU/quantity pairs of each page as JSON")
+    parser.add_argument("--verify", nargs="*", choices=EXTRACT_MODES, metavar="MODE",
+                        help="read the output back with these extract modes (default: all) "
+                             "and compare with what was generated")
+    args = parser.parse_args()
+
+    if args.sku_map:
+        with open(args.sku_map, 'r', encoding='utf-8') as f:
+            skus = list(json.load(f))
+        default_mix = {sku: DEFAULT_MIX.get(sku, 1) for sku in skus}
+    else:
+        default_mix = DEFAULT_MIX
+    sku_weights = weights_from_args(args.mix, default_mix)
+    qty_weights = {int(qty): weight for qty, weight in weights_from_args(args.qty, DEFAULT_QTY).items()}
+    output = args.output or f"manifest_{args.pages}.pdf"
+
+    start = time.perf_counter()
+    expected = write_manifest(output, args.pages, sku_weights, qty_weights, args.split_share,
+                              args.multi_share, args.continued_share, args.seed)
+    print(f"Wrote {output}: {len(expected)} pages, {os.path.getsize(output) / 1e6:.1f} MB "
+          f"in {time.perf_counter() - start:.1f} s")
+    if args.expected:
+        with open(args.expected, 'w', encoding='utf-8') as f:
+            json.dump(expected, f)
+
+    if args.verify is not None:
+        return 0 if verify(output, expected, args.verify or list(EXTRACT_MODES)) else 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,349 @@
+"""
+PDF Content Stream Helpers
+Cheap access to the raw drawing operators and objects of a page, without
+running MuPDF's text layout analysis or loading the page.
+"""
+
+import re
+from typing import List, Optional, Tuple
+
+import fitz  # PyMuPDF
+
+# "/Name Do" draws an XObject; Shiprocket labels draw the whole label as
+# one form XObject (/TPL0 Do) from an otherwise empty page
+XOBJECT_DO = re.compile(rb'/([^\s/\[\]()<>{}%]+)\s+Do\b')
+
+# Indirect references inside a resource dictionary, e.g. "/F1 211 0 R"
+FONT_REF = re.compile(r'/[^\s/]+\s+(\d+)\s+0\s+R')
+REFERENCE = re.compile(r'(\d+)\s+0\s+R')
+# (name, xref) of each entry of a /Font dictionary, and keys of a font
+FONT_ENTRY = re.compile(r'/([^\s/\[\]()<>{}%]+)\s*(\d+)\s+0\s+R')
+FONT_SUBTYPE = re.compile(r'/Subtype\s*(/[^\s/\[\]()<>{}%]+)')
+FONT_ENCODING = re.compile(r'/Encoding\s*(/[^\s/\[\]()<>{}%]+|<<|\d+\s+0\s+R)')
+
+# How deep to follow forms drawn inside forms, and page tree parents when
+# looking for inherited resources
+MAX_FORM_DEPTH = 2
+MAX_TREE_DEPTH = 32
+
+# Text-showing operators with literal strings: "[(...) -250 (...)] TJ",
+# "(...) Tj", "(...) '" and "... (...) \""
+TEXT_SHOW = re.compile(rb'\[((?:[^\]()\\]|\((?:[^()\\]|\\.)*\)|\\.)*)\]\s*TJ'
+                       rb'|\(((?:[^()\\]|\\.)*)\)\s*(?:Tj|\'|")')
+LITERAL = re.compile(rb'\(((?:[^()\\]|\\.)*)\)')
+# A TJ array holding exactly one string, i.e. text not split up for kerning
+SINGLE_STRING_TJ = re.compile(rb'\[\s*\((?:[^()\\]|\\.)*\)\s*\]\s*TJ')
+ANY_TJ = re.compile(rb'\]\s*TJ')
+# The string shown by "(...) Tj", "[(...)] TJ", "(...) '" or "(...) \""
+SHOWN_STRING = re.compile(rb'\(((?:[^()\\]|\\.)*)\)\s*(?:\]\s*TJ|Tj|\'|")')
+# "/F1 6.8 Tf" selects a font
+TEXT_FONT = re.compile(rb'/([^\s/\[\]()<>{}%]+)\s+[-+\d.]+\s+Tf\b')
+HEX_TEXT = re.compile(rb'<[0-9A-Fa-f\s]*>\s*(?:\]\s*)?(?:TJ|Tj|\'|")|<[0-9A-Fa-f\s]*>\s*-?[\d.]*\s*[(<]')
+
+# Simple fonts whose string bytes map straight to Latin text
+SIMPLE_FONT_TYPES = ("/Type1", "/TrueType", "/MMType1")
+SIMPLE_ENCODINGS = ("/WinAnsiEncoding", "/StandardEncoding", "/MacRomanEncoding")
+
+ESCAPES = {b"n": b"\n", b"r": b"\r", b"t": b"\t", b"b": b"\b", b"f": b"\f",
+           b"(": b"(", b")": b")", b"\\": b"\\"}
+ESCAPE = re.compile(rb'\\([0-7]{1,3}|\r\n|[\r\n]|.)', re.S)
+
+
+def _resolve_form(doc: fitz.Document, holder_xref: int, name: str, page: fitz.Page = None,
+                  inherit: bool = False) -> int:
+    """Return the xref of form XObject `name` in the resources of `holder_xref`, or 0."""
+    kind, value = doc.xref_get_key(holder_xref, f"Resources/XObject/{name}")
+    xref = int(value.split()[0]) if kind == "xref" else 0
+    if not xref and page is not None:
+        # Resources inherited from the page tree
+        for item in page.get_xobjects():
+            if item[1] == name:
+                xref = item[0]
+                break
+    elif not xref and inherit:
+        # The same, walking up the page tree by hand
+        node = holder_xref
+        for _ in range(MAX_TREE_DEPTH):
+            kind, value = doc.xref_get_key(node, "Parent")
+            if kind != "xref":
+                break
+            node = int(value.split()[0])
+            kind, value = doc.xref_get_key(node, f"Resources/XObject/{name}")
+            if kind == "xref":
+                xref = int(value.split()[0])
+                break
+    if xref and doc.xref_get_key(xref, "Subtype") == ("name", "/Form"):
+        return xref
+    return 0
+
+
+def content_xrefs(doc: fitz.Document, page_xref: int) -> List[int]:
+    """The xrefs of a page's /Contents streams, read without loading the page."""
+    kind, contents = doc.xref_get_key(page_xref, "Contents")
+    if kind == "xref":
+        return [int(contents.split()[0])]
+    if kind == "array":
+        return [int(ref) for ref in REFERENCE.findall(contents)]
+    return []
+
+
+def page_streams(page: fitz.Page) -> List[Tuple[int, bytes]]:
+    """
+    Return (resource holder xref, decompressed stream) for the page's content
+    streams, followed by the form XObjects it draws (in drawing order). The
+    holder is the page for its own contents and the form itself for a form.
+    """
+    return _page_streams(page.parent, page.xref, page.get_contents(), page)
+
+
+def page_xref_streams(doc: fitz.Document, page_xref: int) -> List[Tuple[int, bytes]]:
+    """
+    page_streams for the page object `page_xref` (see Document.page_xref).
+    This never loads the page, which MuPDF makes expensive when all pages
+    share one large resource dictionary.
+    """
+    return _page_streams(doc, page_xref, content_xrefs(doc, page_xref))
+
+
+def _page_streams(doc: fitz.Document, page_xref: int, contents: List[int],
+                  page: fitz.Page = None) -> List[Tuple[int, bytes]]:
+    streams = [(page_xref, doc.xref_stream(xref) or b"") for xref in contents]
+    pending = [(holder_xref, stream, 0) for holder_xref, stream in streams]
+    seen = set()
+    while pending:
+        holder_xref, stream, depth = pending.pop(0)
+        if depth >= MAX_FORM_DEPTH:
+            continue
+        for match in XOBJECT_DO.finditer(stream):
+            name = match.group(1).decode("latin-1")
+            on_page = holder_xref == page_xref
+            xref = _resolve_form(doc, holder_xref, name, page if on_page else None, on_page)
+            if not xref or xref in seen:
+                continue
+            seen.add(xref)
+            form_stream = doc.xref_stream(xref) or b""
+            streams.append((xref, form_stream))
+            pending.append((xref, form_stream, depth + 1))
+    return streams
+
+
+def page_content_streams(page: fitz.Page) -> List[bytes]:
+    """Return the decompressed content streams the page draws, in drawing order."""
+    return [stream for _, stream in page_streams(page)]
+
+
+def stream_font_names(doc: fitz.Document, holder_xref: int) -> List[str]:
+    """
+    Return the base font names in the /Font resources of one stream holder,
+    with subset prefixes ("ABCDEF+") removed. Unlike Page.get_fonts this only
+    looks at the fonts of that holder, not every resource the page inherits.
+    """
+    kind, value = doc.xref_get_key(holder_xref, "Resources/Font")
+    if kind == "xref":
+        value = doc.xref_object(int(value.split()[0]))
+    elif kind != "dict":
+        return []
+    names = []
+    for font_xref in FONT_REF.findall(value):
+        kind, base = doc.xref_get_key(int(font_xref), "BaseFont")
+        if kind == "name":
+            names.append(base.lstrip("/").split("+")[-1])
+    return names
+
+
+def _simple_fonts_only(doc: fitz.Document, holder_xref: int, stream: bytes) -> bool:
+    """
+    True if every font the stream selects is in the holder's own /Font
+    resources and maps string bytes directly to text. Fonts inherited from
+    the page tree, or selected by the stream that draws a form, count as
+    unknown.
+    """
+    names = set(TEXT_FONT.findall(stream))
+    if not names:
+        return False
+    kind, value = doc.xref_get_key(holder_xref, "Resources/Font")
+    if kind == "xref":
+        value = doc.xref_object(int(value.split()[0]))
+    elif kind != "dict":
+        return False
+    fonts = dict(FONT_ENTRY.findall(value))
+    for name in names:
+        font_xref = fonts.get(name.decode("latin-1"))
+        if font_xref is None:
+            return False
+        # One read of the font dictionary instead of a lookup per key
+        font = doc.xref_object(int(font_xref), compressed=True)
+        subtype = FONT_SUBTYPE.search(font)
+        encoding = FONT_ENCODING.search(font)
+        if (subtype is None or subtype.group(1) not in SIMPLE_FONT_TYPES
+                or encoding is not None and encoding.group(1) not in SIMPLE_ENCODINGS
+                or "/ToUnicode" in font):
+            return False
+    return True
+
+
+def _unescape(match) -> bytes:
+    code = match.group(1)
+    if code[:1].isdigit():
+        return bytes([int(code, 8) & 0xFF])
+    if code in (b"\r\n", b"\r", b"\n"):
+        return b""  # line continuation
+    return ESCAPES.get(code, code)
+
+
+def decode_literal(raw: bytes) -> str:
+    """Decode the body of a PDF literal string drawn with a simple font."""
+    if b"\\" in raw:
+        raw = ESCAPE.sub(_unescape, raw)
+    return raw.decode("latin-1").replace("\xa0", " ")
+
+
+def _show_text(match) -> str:
+    if match.group(1) is not None:
+        return "".join(decode_literal(m.group(1)) for m in LITERAL.finditer(match.group(1)))
+    return decode_literal(match.group(2))
+
+
+def scan_text_lines(page: fitz.Page, anchor: bytes, following: int = 2) -> Optional[List[str]]:
+    """
+    Read the strings drawn around `anchor` straight from the content streams.
+
+    Returns the text of each text-showing operator from the first one that
+    draws `anchor` through `following` operators past the last one, one
+    string per line. Returns [] when the page confidently does not draw
+    `anchor`, and None when the streams can't be decoded with confidence
+    (hex or kerned strings, an anchor drawn in pieces, composite, custom
+    or inherited fonts): then the caller should use MuPDF's text
+    extraction instead.
+    """
+    return scan_stream_text_lines(page.parent, page_streams(page), anchor, following)
+
+
+def scan_stream_text_lines(doc: fitz.Document, streams: List[Tuple[int, bytes]], anchor: bytes,
+                           following: int = 2) -> Optional[List[str]]:
+    """scan_text_lines over streams already read with page_streams or page_xref_streams."""
+    lines: List[str] = []
+    anchor_text = anchor.decode("latin-1")
+    if _draws_unread_forms(doc, streams):
+        return None
+    # Text of all the streams, to catch an anchor split across text objects
+    page_text: List[bytes] = []
+    page_count = 0
+    for holder_xref, stream in streams:
+        if b"BT" not in stream:
+            continue
+        if HEX_TEXT.search(stream) or not _simple_fonts_only(doc, holder_xref, stream):
+            return None
+        # Strings split up for kerning can hide an anchor or add gaps MuPDF reads as spaces
+        if len(ANY_TJ.findall(stream)) != len(SINGLE_STRING_TJ.findall(stream)):
+            return None
+
+        # The string of each text-showing operator (TJ arrays hold one string here)
+        raw_strings = SHOWN_STRING.findall(stream)
+        strings = raw_strings
+        if b"\\" in stream:
+            strings = [decode_literal(raw).encode("latin-1") for raw in raw_strings]
+        # Every anchor must sit whole in one string: one drawn in pieces (or
+        # hidden in an escape) only shows in the joined text, checked below
+        count = stream.count(anchor)
+        if (sum(raw.count(anchor) for raw in raw_strings) != count
+                or strings is not raw_strings and sum(text.count(anchor) for text in strings) != count):
+            return None
+        page_text.extend(strings)
+        page_count += count
+        if not count:
+            continue
+
+        pos = stream.find(anchor)
+        last_anchor = stream.rfind(anchor)
+        remaining = None
+        for match in TEXT_SHOW.finditer(stream, max(0, stream.rfind(b"BT", 0, pos))):
+            text = _show_text(match)
+            lines.append(text)
+            if anchor_text in text and not text.rsplit(anchor_text, 1)[1].strip():
+                # The SKU is drawn apart from its anchor
+                return None
+            if match.start() <= last_anchor < match.end():
+                remaining = following
+            elif remaining is not None:
+                remaining -= 1
+                if remaining <= 0:
+                    break
+    # Joined up, the strings of all text objects and streams must not make
+    # more anchors than the strings hold one by one
+    if b"".join(page_text).count(anchor) != page_count:
+        return None
+    return lines
+
+
+def _draws_unread_forms(doc: fitz.Document, streams: List[Tuple[int, bytes]]) -> bool:
+    """True if a stream draws a form that is not among `streams` (nested past MAX_FORM_DEPTH)."""
+    if not streams:
+        return False
+    page_xref = streams[0][0]
+    read = {holder_xref for holder_xref, _ in streams}
+    for holder_xref, stream in streams:
+        # The forms the page itself draws are always read
+        if holder_xref == page_xref:
+            continue
+        for match in XOBJECT_DO.finditer(stream):
+            xref = _resolve_form(doc, holder_xref, match.group(1).decode("latin-1"))
+            if xref and xref not in read:
+                return True
+    return False
+
+
+def own_page_resources(doc: fitz.Document, page_xref: int) -> bool:
+    """
+    Give a page that shares an indirect resource dictionary its own copy,
+    listing only the XObjects its content streams draw. Shiprocket
+    manifests share one dictionary listing every page's form, so copying a
+    single page would otherwise graft the forms of all pages. Returns
+    False and leaves the page alone if its resources can't be trimmed.
+    """
+    kind, value = doc.xref_get_key(page_xref, "Resources")
+    if kind != "xref":
+        return False
+    resources_xref = int(value.split()[0])
+    # Only keys are listed: printing the shared dictionary itself costs
+    # time proportional to the page count
+    keys = doc.xref_get_keys(resources_xref)
+    if "XObject" not in keys:
+        return False
+    contents = content_xrefs(doc, page_xref)
+    if not contents:
+        return False
+
+    names = []
+    for xref in contents:
+        for match in XOBJECT_DO.finditer(doc.xref_stream(xref) or b""):
+            name = match.group(1).decode("latin-1")
+            if name not in names:
+                names.append(name)
+    xobjects = []
+    for name in names:
+        kind, ref = doc.xref_get_key(resources_xref, f"XObject/{name}")
+        if kind != "null":
+            xobjects.append(f"/{name} {ref}")
+    entries = []
+    for key in keys:
+        if key == "XObject":
+            entries.append("/XObject<<" + " ".join(xobjects) + ">>")
+        else:
+            entries.append(f"/{key} {doc.xref_get_key(resources_xref, key)[1]}")
+    doc.xref_set_key(page_xref, "Resources", "<<" + "".join(entries) + ">>")
+    return True
+
+
+def show_only_pages(doc: fitz.Document, page_xrefs: List[int]):
+    """
+    Make the in-memory `doc` consist of just the pages page_xrefs, in that
+    order, by pointing the root of its page tree at them. Finding a page by
+    number makes MuPDF parse every page object before it, so on a huge file
+    this keeps lookups (and Document.insert_pdf) to the pages wanted. The
+    pages keep their /Parent, so inherited attributes still resolve.
+    """
+    pages_xref = int(doc.xref_get_key(doc.pdf_catalog(), "Pages")[1].split()[0])
+    doc.xref_set_key(pages_xref, "Kids", "[" + " ".join(f"{xref} 0 R" for xref in page_xrefs) + "]")
+    doc.xref_set_key(pages_xref, "Count", str(len(page_xrefs)))
+
@@ -0,0 +1,37 @@
+"""
+Engine Settings
+The SKU map, output modes and save profiles, shared by the label engine
+and the GUI. Kept free of PyMuPDF so the GUI can build its window without
+loading it.
+"""
+
+# SKU to product name mapping
+DEFAULT_SKU_MAP = {
+    "TN0001": "OIL",
+    "TN0002": "Potli",
+    "TN003": "Rollon",
+    "TS-NLT5-CZ47": "OIL",
+    "84-HNM4-WOND": "Potli",
+}
+
+# How the output is built: "copy" pages into a new PDF, or "select"
+# (reorder) the pages of the source document in place
+OUTPUT_MODES = ("copy", "select")
+DEFAULT_OUTPUT_MODE = "copy"
+
+# Named Document.save option sets ("subset_fonts" runs Document.subset_fonts
+# first). Measured trade-offs are in benchmarks/README.md.
+SAVE_PROFILES = {
+    # Dispatch time: write the objects as they are, no dedup or compression
+    "fast": {"garbage": 1, "deflate": False, "clean": False},
+    # Merge duplicate objects and streams, compress new streams and pack
+    # small objects into object streams
+    "balanced": {"garbage": 4, "deflate": True, "use_objstms": 1, "clean": False},
+    # Archiving: also recompress images and fonts, sanitize content streams
+    # and subset embedded fonts
+    "compact": {"garbage": 4, "deflate": True, "deflate_images": True, "deflate_fonts": True,
+                "use_objstms": 1, "clean": True, "subset_fonts": True},
+}
+# At thousands of pages the garbage=4 save of "balanced" takes most of the
+# run, so it is only used when asked for
+DEFAULT_SAVE_PROFILE = "fast"
@@ -0,0 +1,139 @@
+"""
+Job Worker
+Runs label_engine.process_pdf in a separate process so a long run never
+holds the GUI's interpreter. The process is started ahead of time and
+imports the engine (and with it PyMuPDF) while the user is still picking
+files. Log lines, progress events and results come back over a pipe.
+A job can be asked to stop at the next page or stage, which keeps the
+pages it read in the worker for the next job, or stopped at once by
+killing the process; a crash only fails the job.
+"""
+
+import multiprocessing
+import traceback
+from typing import List, Tuple
+
+# Seconds to wait for the worker to exit on its own before killing it
+STOP_TIMEOUT = 2
+
+Event = Tuple
+
+
+def _worker_main(conn, cancel):
+    # The import is the warm-up: PyMuPDF is loaded before the first job
+    from label_engine import process_pdf
+    from run_progress import RunCancelled
+
+    def log(message: str):
+        conn.send(("log", message))
+
+    def progress(stage: str, done: int, total: int):
+        conn.send(("progress", stage, done, total))
+
+    conn.send(("ready",))
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            return
+        if job is None:
+            return
+        try:
+            # Pages read are kept between jobs, so a restarted job skips them
+            summary = process_pdf(log=log, progress=progress, cancelled=cancel.is_set, keep_pages=True, **job)
+        except RunCancelled:
+            conn.send(("cancelled",))
+        except Exception as e:
+            conn.send(("error", str(e), traceback.format_exc()))
+        else:
+            conn.send(("done", summary))
+
+
+class JobWorker:
+    """
+    One worker process, one job at a time. poll() returns the events
+    received so far:
+      ("ready",)                    the engine is imported
+      ("log", message)
+      ("progress", stage, done, total)  see run_progress
+      ("done", summary)             process_pdf's return value
+      ("cancelled",)                the job stopped after request_cancel()
+      ("error", message, details)   the job raised, or the process died
+    """
+
+    def __init__(self):
+        # spawn on every platform: forking a process that runs Tk is unsafe
+        self._context = multiprocessing.get_context("spawn")
+        self._process = None
+        self._conn = None
+        self._cancel = self._context.Event()
+        self.busy = False
+
+    def start(self):
+        """Start the process if it is not running; returns at once."""
+        if self._process is not None and self._process.is_alive():
+            return
+        self._conn, child_conn = self._context.Pipe()
+        self._process = self._context.Process(target=_worker_main, args=(child_conn, self._cancel),
+                                              name="label-worker", daemon=True)
+        self._process.start()
+        child_conn.close()
+
+    def submit(self, **job):
+        """Run process_pdf(**job) in the worker (log and progress are supplied by the worker)."""
+        if self.busy:
+            raise RuntimeError("A job is already running")
+        self.start()
+        self._cancel.clear()
+        self._conn.send(job)
+        self.busy = True
+
+    def poll(self, limit: int) -> List[Event]:
+        """Up to `limit` events that have arrived, without blocking."""
+        events: List[Event] = []
+        if self._conn is None:
+            return events
+        try:
+            while len(events) < limit and self._conn.poll():
+                events.append(self._conn.recv())
+        except (EOFError, OSError):
+            # The process died (killed, out of memory, crash in MuPDF)
+            self._process.join(STOP_TIMEOUT)
+            code = self._process.exitcode
+            self._discard()
+            if self.busy:
+                events.append(("error", f"The worker process exited unexpectedly (exit code {code})", ""))
+        for event in events:
+            if event[0] in ("done", "cancelled", "error"):
+                self.busy = False
+        return events
+
+    def request_cancel(self):
+        """Ask the running job to stop at its next page or stage."""
+        self._cancel.set()
+
+    def cancel(self):
+        """Kill the running job and start a fresh worker for the next one."""
+        self._kill()
+        self.busy = False
+        self.start()
+
+    def close(self):
+        if self._conn is not None:
+            try:
+                self._conn.send(None)
+            except OSError:
+                pass
+            self._process.join(STOP_TIMEOUT)
+        self._kill()
+
+    def _kill(self):
+        if self._process is not None and self._process.is_alive():
+            self._process.kill()
+            self._process.join()
+        self._discard()
+
+    def _discard(self):
+        if self._conn is not None:
+            self._conn.close()
+        self._process = self._conn = None
@@ -0,0 +1,1146 @@
+#!/usr/bin/env python3
+"""
+Shiprocket Label Engine
+Headless PDF label processing shared by the GUI and the command line.
+
+Usage:
+    python label_engine.py input.pdf
+    python label_engine.py manifests/ --output-dir processed/
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import re
+import sqlite3
+import sys
+import tempfile
+import time
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor
+from itertools import chain
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import fitz  # PyMuPDF
+
+from content_stream import (own_page_resources, page_xref_streams, scan_stream_text_lines, scan_text_lines,
+                            show_only_pages)
+from engine_settings import (DEFAULT_OUTPUT_MODE, DEFAULT_SAVE_PROFILE, DEFAULT_SKU_MAP, OUTPUT_MODES,
+                             SAVE_PROFILES)
+from label_stamping import LabelStamper
+from label_templates import DEFAULT_TEMPLATES_PATH, TemplateCache
+from page_cache import DEFAULT_PAGE_CACHE_PATH, PageCache, page_key
+from pdf_concat import concat_pdfs
+from result_cache import DEFAULT_RESULT_CACHE_DIR, ResultCache, run_key
+from run_profiler import checkpoint, profile_run
+from run_progress import CancelFunc, ProgressFunc, ProgressReporter
+from run_report import RunReport, default_report_path, write_report
+
+# SKUs that only get a label when ordered in quantity (see classify_pages)
+SPECIAL_SKUS = ("TN0001", "TS-NLT5-CZ47")
+
+# Label stamp position and style on marked pages
+LABEL_POINT = (5, 250)
+LABEL_FONT = "Courier-Bold"
+LABEL_FONTSIZE = 12
+
+OUTPUT_SUFFIX = "_processed.pdf"
+
+# Optional content group holding every label when stamping into a layer:
+# None stamps without a layer, "on"/"off" is the layer's initial visibility
+LABEL_LAYER_NAME = "Product labels"
+LABEL_LAYER_STATES = ("on", "off")
+
+# Parallel extraction: each worker gets a few shards so a slow shard
+# does not leave the other cores idle, but never tiny ones
+SHARDS_PER_WORKER = 4
+MIN_SHARD_PAGES = 50
+
+# Streaming (low memory) runs write the output in chunks of this many pages
+# and join them at the end, and empty MuPDF's store every STORE_FLUSH_PAGES
+# pages read
+STREAM_CHUNK_PAGES = 1000
+STORE_FLUSH_PAGES = 200
+
+# Manifests whose page SKUs process_pdf(keep_pages=True) keeps in memory,
+# so a run restarted with other output settings does not read them again
+KEPT_MANIFESTS = 4
+
+# Page text readers: "content" reads the strings around "SKU:" straight
+# from the raw content streams (falling back to "full" when it can't),
+# "full" reads the whole page text, "clip" only the product-details rows
+# around the "SKU:" anchors, "template" reads words by the SKU/Qty column
+# positions cached for the page's layout
+EXTRACT_MODES = ("content", "full", "clip", "template")
+DEFAULT_EXTRACT_MODE = "content"
+SKU_ANCHOR = "SKU:"
+# The "clip" reader only reads the left part of the page, where the SKU and
+# Qty columns of the product table are
+CLIP_WIDTH = 0.45
+QTY_HEADER = "Qty"
+# Part of every page cache key: bump it when a change to the readers or
+# parsers below would read the same page differently
+PARSER_VERSION = 3
+# Part of every result cache key: bump it when a change to classification,
+# ordering, stamping or output building changes the output of a run
+OUTPUT_VERSION = 1
+# First text after the product table; no SKU rows follow it
+TABLE_END = "\nShip To"
+
+SKU_PATTERN = re.compile(r'SKU:\s*([\w\-]+)')
+QTY_PATTERN = re.compile(r'(\d+)')
+SKU_VALUE = re.compile(r'[\w\-]+')
+
+# One (sku, qty) tuple per product line found on a page
+PageSkus = List[Tuple[str, int]]
+# What a page reader extracts before parsing: page text, or words with the
+# template plan to read them by
+PageText = Union[str, Tuple[List[Tuple], Dict]]
+LogFunc = Callable[[str], None]
+
+# Page SKUs read so far by manifest, most recently used last (see kept_pages)
+_kept_pages: "OrderedDict[Tuple, List[PageSkus]]" = OrderedDict()
+
+
+def load_sku_map(path: Optional[str] = None) -> Dict[str, str]:
+    """Return the default SKU map, updated with entries from a JSON file."""
+    sku_map = dict(DEFAULT_SKU_MAP)
+    if path:
+        with open(path, 'r', encoding='utf-8') as f:
+            sku_map.update(json.load(f))
+    return sku_map
+
+
+def _read_qty(line: str) -> int:
+    qty_match = QTY_PATTERN.search(line)
+    return int(qty_match.group(1)) if qty_match else 1
+
+
+def _join_split_sku(sku_prefix: str, sku_suffix: str) -> str:
+    # Always ensure dash between prefix and suffix if not present
+    if sku_prefix and sku_suffix and not sku_prefix.endswith("-") and not sku_suffix.startswith("-"):
+        sku = sku_prefix + "-" + sku_suffix
+    else:
+        sku = sku_prefix + sku_suffix
+    return sku.replace(" ", "")
+
+
+def _line_at(text: str, start: int) -> Tuple[Optional[str], int]:
+    """Return the line of `text` beginning at `start` and where the next one begins."""
+    if start >= len(text):
+        return None, len(text)
+    end = text.find("\n", start)
+    if end == -1:
+        return text[start:], len(text)
+    return text[start:end], end + 1
+
+
+def parse_page_text(text: str) -> PageSkus:
+    """
+    Find all SKUs and their quantities in the text of one page.
+
+    Single pass: jumps from one "SKU:" anchor to the next with str.find,
+    reads the SKU (joining one split over two lines) and its quantity line,
+    and stops once the text after the product table starts.
+    """
+    found = []
+    pos = text.find(SKU_ANCHOR)
+    while pos != -1:
+        line, next_start = _line_at(text, text.rfind("\n", 0, pos) + 1)
+        sku_match = SKU_PATTERN.search(line)
+        if sku_match and not sku_match.group(1).endswith('-'):
+            # SKU on one line, quantity on the next
+            sku = sku_match.group(1)
+            qty_start = next_start
+        else:
+            # SKU split across two lines (e.g. 'SKU: TS-NLT5-' and 'CZ47'),
+            # quantity on the third
+            sku_suffix, qty_start = _line_at(text, next_start)
+            sku = _join_split_sku(line.strip().replace(SKU_ANCHOR, "").strip(),
+                                  sku_suffix.strip() if sku_suffix is not None else "")
+        qty_line, _ = _line_at(text, qty_start)
+        found.append((sku, _read_qty(qty_line) if qty_line is not None else 1))
+
+        pos = text.find(SKU_ANCHOR, next_start)
+        if pos != -1 and text.find(TABLE_END, next_start, pos) != -1:
+            break
+    return found
+
+
+def _read_full(page: fitz.Page) -> PageText:
+    return page.get_text()
+
+
+def _band_lines(words: List[Tuple], top: float, bottom: float) -> List[str]:
+    """Rebuild the text lines whose words sit vertically inside [top, bottom]."""
+    lines = []
+    current_key = None
+    for x0, y0, x1, y1, word, block_no, line_no, _ in words:
+        if not top <= (y0 + y1) / 2 <= bottom:
+            continue
+        if (block_no, line_no) == current_key:
+            lines[-1] += " " + word
+        else:
+            lines.append(word)
+            current_key = (block_no, line_no)
+    return lines
+
+
+def _read_clip(page: fitz.Page) -> PageText:
+    rect = page.rect
+    clip = fitz.Rect(rect.x0, rect.y0, rect.x0 + rect.width * CLIP_WIDTH, rect.y1)
+    # Words cut by the edge of the clip are left out
+    words = [w for w in page.get_textpage(clip=clip).extractWORDS() if w[2] < clip.x1 - 1]
+    anchors = [w for w in words if w[4].startswith(SKU_ANCHOR)]
+    if not anchors or not any(w[4] == QTY_HEADER for w in words):
+        # No product table with its Qty column inside the clip: read the full page
+        return _read_full(page)
+    # The product rows: from the first anchor down to two lines below the
+    # last one, which covers the suffix of a split SKU and the Qty column
+    top = min(w[1] for w in anchors) - 1
+    bottom = max(w[3] + 2 * (w[3] - w[1]) for w in anchors) + 1
+    return "\n".join(_band_lines(words, top, bottom))
+
+
+def _column_qty(words: List[Tuple], anchor: Tuple, qty_column: List[float]) -> int:
+    """Quantity in the Qty column on the anchor's table row (default 1)."""
+    x0, x1 = qty_column
+    row_center = (anchor[1] + anchor[3]) / 2
+    tolerance = anchor[3] - anchor[1]
+    best = None
+    for word in words:
+        if not x0 <= word[0] < x1:
+            continue
+        distance = abs((word[1] + word[3]) / 2 - row_center)
+        if distance <= tolerance and (best is None or distance < best[0]):
+            best = (distance, word[4])
+    return _read_qty(best[1]) if best else 1
+
+
+def parse_words_by_columns(words: List[Tuple], plan: Dict) -> PageSkus:
+    """Find SKUs and quantities from word positions, using a template plan."""
+    sku_x0, sku_x1 = plan["sku_column"]
+    found = []
+    for anchor in words:
+        if not anchor[4].startswith(SKU_ANCHOR) or not sku_x0 <= anchor[0] < sku_x1:
+            continue
+        block_no, line_no, word_no = anchor[5], anchor[6], anchor[7]
+        # Rest of the SKU cell on the anchor's line ("SKU:TN0001" has no gap)
+        tokens = [anchor[4][len(SKU_ANCHOR):]] if len(anchor[4]) > len(SKU_ANCHOR) else []
+        tokens += [w[4] for w in words if (w[5], w[6]) == (block_no, line_no) and w[7] > word_no]
+        sku_match = SKU_VALUE.match(tokens[0]) if tokens else None
+        if sku_match and not sku_match.group(0).endswith('-'):
+            sku = sku_match.group(0)
+        else:
+            # SKU continues on the next line of the same cell (e.g. 'TS-NLT5-' and 'CZ47')
+            suffix = "".join(w[4] for w in words
+                             if (w[5], w[6]) == (block_no, line_no + 1) and w[0] < sku_x1)
+            sku = _join_split_sku("".join(tokens), suffix)
+        found.append((sku, _column_qty(words, anchor, plan["qty_column"])))
+    return found
+
+
+_template_cache: Optional[TemplateCache] = None
+
+
+def get_template_cache() -> TemplateCache:
+    """The layout template cache of this process, loaded on first use."""
+    global _template_cache
+    if _template_cache is None:
+        _template_cache = TemplateCache(DEFAULT_TEMPLATES_PATH, default_stamp=LABEL_POINT,
+                                        stamp_fontsize=LABEL_FONTSIZE)
+    return _template_cache
+
+
+def _read_template(page: fitz.Page) -> PageText:
+    cache = get_template_cache()
+    plan = cache.known_plan(page)
+    if plan is not None and plan["sku_column"] is not None:
+        # Known layout: only read the page from its SKU column to its Qty column
+        rect = page.rect
+        clip = fitz.Rect(plan["sku_column"][0], rect.y0, plan["qty_column"][1], rect.y1)
+        words = [w for w in page.get_textpage(clip=clip).extractWORDS() if w[2] < clip.x1 - 1]
+        sku_x0, sku_x1 = plan["sku_column"]
+        if any(w[4].startswith(SKU_ANCHOR) and sku_x0 <= w[0] < sku_x1 for w in words):
+            return words, plan
+        # No SKU in the plan's column: the layout is off, read the full page
+    textpage = page.get_textpage()
+    words = textpage.extractWORDS()
+    plan = cache.plan_for(page, words)
+    if plan["sku_column"] is None:
+        # Layout without a product table header: use the line parser
+        return textpage.extractText()
+    return words, plan
+
+
+def _read_content(page: fitz.Page) -> PageText:
+    # The SKU line plus the two lines after it, as parse_page_text reads them
+    lines = scan_text_lines(page, SKU_ANCHOR.encode("latin-1"), following=2)
+    if lines is None:
+        return _read_full(page)
+    return "\n".join(lines)
+
+
+def _read_content_xref(doc: fitz.Document, page_num: int,
+                       streams: Optional[List[Tuple[int, bytes]]] = None) -> PageText:
+    # _read_content without loading the page unless it has to fall back
+    if streams is None:
+        streams = page_xref_streams(doc, doc.page_xref(page_num))
+    lines = scan_stream_text_lines(doc, streams, SKU_ANCHOR.encode("latin-1"), following=2)
+    if lines is None:
+        return _read_full(doc[page_num])
+    return "\n".join(lines)
+
+
+_PAGE_READERS = {
+    "content": _read_content,
+    "full": _read_full,
+    "clip": _read_clip,
+    "template": _read_template,
+}
+
+
+def parse_page(page_text: PageText) -> PageSkus:
+    """Parse what a page reader extracted into SKU/quantity pairs."""
+    if isinstance(page_text, str):
+        return parse_page_text(page_text)
+    return parse_words_by_columns(*page_text)
+
+
+def read_page_skus(page: fitz.Page, mode: str = DEFAULT_EXTRACT_MODE) -> PageSkus:
+    """Read the SKU/quantity pairs of one page with the given extraction mode."""
+    return parse_page(_PAGE_READERS[mode](page))
+
+
+def iter_page_skus(doc: fitz.Document, page_numbers: Iterable[int], mode: str = DEFAULT_EXTRACT_MODE,
+                   timings: Optional[Dict[str, float]] = None, flush_every: int = 0,
+                   cache: Optional[PageCache] = None) -> Iterator[PageSkus]:
+    """
+    Yield the SKU/quantity pairs of each of page_numbers, one page at a
+    time. With timings, the seconds spent extracting text and parsing it
+    are added to its "extract" and "parse" entries as pages are consumed.
+    With flush_every, MuPDF's resource store (fonts, images and parsed
+    objects it caches) is emptied after every that many pages, which keeps
+    memory flat on large manifests. With a page cache, pages whose content
+    streams were read before are not read again; they are counted in
+    timings["cached_pages"] and their lookup time goes to "extract".
+    """
+    reader = _PAGE_READERS[mode]
+    namespace = f"{mode}/{PARSER_VERSION}"
+    for n, i in enumerate(page_numbers, 1):
+        start = time.perf_counter()
+        streams = None
+        if cache is not None:
+            streams = page_xref_streams(doc, doc.page_xref(i))
+            key = page_key([stream for _, stream in streams], namespace)
+            page_skus = cache.get(key)
+            if page_skus is not None:
+                if timings is not None:
+                    timings["extract"] = timings.get("extract", 0.0) + time.perf_counter() - start
+                    timings["cached_pages"] = timings.get("cached_pages", 0) + 1
+                yield page_skus
+                continue
+        # Loading a page costs time and memory proportional to the resources
+        # it shares with other pages, so the content reader goes by xref
+        page_text = _read_content_xref(doc, i, streams) if mode == "content" else reader(doc[i])
+        parsed = time.perf_counter()
+        page_skus = parse_page(page_text)
+        if cache is not None:
+            cache.put(key, page_skus)
+        if timings is not None:
+            timings["extract"] = timings.get("extract", 0.0) + parsed - start
+            timings["parse"] = timings.get("parse", 0.0) + time.perf_counter() - parsed
+        if flush_every and n % flush_every == 0:
+            fitz.TOOLS.store_shrink(100)
+        yield page_skus
+
+
+def stream_page_skus(input_path: str, page_xrefs: List[int], mode: str = DEFAULT_EXTRACT_MODE,
+                     timings: Optional[Dict[str, float]] = None, chunk_pages: int = STREAM_CHUNK_PAGES,
+                     cache: Optional[PageCache] = None) -> Iterator[PageSkus]:
+    """
+    iter_page_skus over the pages page_xrefs (the xref of every page, see
+    Document.page_xref) in bounded memory. MuPDF keeps every object it
+    parsed until the document is closed, so the file is reopened for each
+    chunk_pages pages, showing only those (see show_only_pages).
+    """
+    for start in range(0, len(page_xrefs), chunk_pages):
+        chunk = page_xrefs[start:start + chunk_pages]
+        with fitz.open(input_path) as doc:
+            show_only_pages(doc, chunk)
+            yield from iter_page_skus(doc, range(len(chunk)), mode, timings, STORE_FLUSH_PAGES, cache)
+        fitz.TOOLS.store_shrink(100)
+
+
+def track_pages(page_skus: Iterable[PageSkus], total: int,
+                progress: Optional[ProgressFunc]) -> Iterator[PageSkus]:
+    """Pass page_skus through, reporting "extract" progress for each page."""
+    if progress is None:
+        yield from page_skus
+        return
+    progress("extract", 0, total)
+    for n, skus in enumerate(page_skus, 1):
+        yield skus
+        progress("extract", n, total)
+
+
+def kept_pages(input_path: str, mode: str) -> List[PageSkus]:
+    """
+    The in-memory list of page SKUs read from input_path with `mode`, in
+    page order, for extraction to continue from and append to. It is keyed
+    by the file's size and modification time, so an edited file starts over.
+    """
+    stat = os.stat(input_path)
+    key = (os.path.abspath(input_path), stat.st_size, stat.st_mtime_ns, mode, PARSER_VERSION)
+    pages = _kept_pages.setdefault(key, [])
+    _kept_pages.move_to_end(key)
+    while len(_kept_pages) > KEPT_MANIFESTS:
+        _kept_pages.popitem(last=False)
+    return pages
+
+
+def _keep(page_skus: Iterable[PageSkus], kept: List[PageSkus]) -> Iterator[PageSkus]:
+    # Appends each page as it is read, so a cancelled run keeps what it read
+    for skus in page_skus:
+        kept.append(skus)
+        yield skus
+
+
+def _extract_pages(doc: fitz.Document, page_numbers: range, mode: str,
+                   timings: Optional[Dict[str, float]], cache: Optional[PageCache] = None,
+                   progress: Optional[ProgressFunc] = None) -> List[PageSkus]:
+    return list(track_pages(iter_page_skus(doc, page_numbers, mode, timings, cache=cache),
+                            len(page_numbers), progress))
+
+
+def extract_page_skus(doc: fitz.Document, mode: str = DEFAULT_EXTRACT_MODE,
+                      timings: Optional[Dict[str, float]] = None,
+                      cache: Optional[PageCache] = None,
+                      progress: Optional[ProgressFunc] = None) -> List[PageSkus]:
+    """
+    Extract the SKU/quantity pairs of every page, in page order. If a
+    timings dict is given, the seconds spent extracting text and parsing it
+    are added to its "extract" and "parse" entries. With a page cache, see
+    iter_page_skus. progress gets an "extract" event per page.
+    """
+    return _extract_pages(doc, range(len(doc)), mode, timings, cache, progress)
+
+
+def open_page_cache(path: Optional[str]) -> Optional[PageCache]:
+    """The page cache at `path`, or None if there is none or it can't be opened."""
+    if not path:
+        return None
+    try:
+        return PageCache(path)
+    except (OSError, sqlite3.Error):
+        # Extraction works the same without it, only slower
+        return None
+
+
+def _extract_shard(input_path: str, start: int, stop: int, mode: str, timed: bool = False,
+                   cache_path: Optional[str] = None) -> Tuple[List[PageSkus], Dict[str, float]]:
+    # Runs in a worker process, which opens its own copy of the document and cache
+    timings: Optional[Dict[str, float]] = {} if timed else None
+    cache = open_page_cache(cache_path)
+    doc = fitz.open(input_path)
+    try:
+        return _extract_pages(doc, range(start, stop), mode, timings, cache), timings or {}
+    finally:
+        doc.close()
+        if cache is not None:
+            cache.close()
+
+
+def page_shards(page_count: int, workers: int) -> List[Tuple[int, int]]:
+    """Split range(page_count) into contiguous (start, stop) shards."""
+    shard_count = max(1, min(workers * SHARDS_PER_WORKER, page_count // MIN_SHARD_PAGES))
+    size, extra = divmod(page_count, shard_count)
+    shards = []
+    start = 0
+    for n in range(shard_count):
+        stop = start + size + (1 if n < extra else 0)
+        shards.append((start, stop))
+        start = stop
+    return shards
+
+
+def extract_page_skus_parallel(input_path: str, page_count: int, executor: Executor,
+                               workers: int, mode: str = DEFAULT_EXTRACT_MODE,
+                               timings: Optional[Dict[str, float]] = None,
+                               cache_path: Optional[str] = None,
+                               progress: Optional[ProgressFunc] = None) -> List[PageSkus]:
+    """
+    Extract SKU/quantity pairs with the page range sharded across a process
+    pool. Shards are merged back in page order, so the result is identical
+    to extract_page_skus. Timings are summed over the workers, each of
+    which uses the page cache at cache_path if given. progress gets an
+    "extract" event per shard.
+    """
+    return list(iter_page_skus_parallel(input_path, page_count, executor, workers, mode, timings,
+                                        cache_path, progress))
+
+
+def iter_page_skus_parallel(input_path: str, page_count: int, executor: Executor,
+                            workers: int, mode: str = DEFAULT_EXTRACT_MODE,
+                            timings: Optional[Dict[str, float]] = None,
+                            cache_path: Optional[str] = None,
+                            progress: Optional[ProgressFunc] = None,
+                            first_page: int = 0) -> Iterator[PageSkus]:
+    """
+    extract_page_skus_parallel for pages first_page onwards, yielding each
+    shard's pages as soon as it and the shards before it are done.
+    """
+    shards = [(first_page + start, first_page + stop)
+              for start, stop in page_shards(page_count - first_page, workers)]
+    futures = [executor.submit(_extract_shard, input_path, start, stop, mode, timings is not None, cache_path)
+               for start, stop in shards]
+    if progress is not None:
+        progress("extract", first_page, page_count)
+    try:
+        for future, (_, stop) in zip(futures, shards):
+            shard_skus, shard_timings = future.result()
+            if timings is not None:
+                for name, seconds in shard_timings.items():
+                    timings[name] = timings.get(name, 0.0) + seconds
+            yield from shard_skus
+            if progress is not None:
+                progress("extract", stop, page_count)
+    except BaseException:
+        # Don't start the shards still queued (e.g. after a cancel)
+        for future in futures:
+            future.cancel()
+        raise
+
+
+def resolve_workers(workers: Optional[int]) -> int:
+    """Map a --workers value to a process count (0 or None means all cores)."""
+    if not workers:
+        return os.cpu_count() or 1
+    return max(1, workers)
+
+
+def make_label(product_name: str, qty: int) -> str:
+    return f"→ {product_name}x{qty}" if qty > 1 else f"→ {product_name}"
+
+
+def _count_pack(counts: Dict, qty: int):
+    if qty in (1, 2, 3):
+        counts[qty] += 1
+    elif qty > 3:
+        counts['more'] += 1
+
+
+def classify_pages(page_skus: Iterable[PageSkus], sku_map: Dict[str, str]) -> Dict:
+    """Decide which pages get a label and collect the pack statistics."""
+    marked_pages: List[Tuple[int, str]] = []
+    unmarked_pages: List[int] = []
+    # Pages where TN0001 and TS-NLT5-CZ47 were left without a label
+    skipped_special_skus = {sku: [] for sku in SPECIAL_SKUS}
+
+    # Stats counters
+    oil_counts = {1: 0, 2: 0, 3: 0, 'more': 0}
+    potli_counts = {1: 0, 2: 0, 3: 0, 'more': 0}
+
+    for i, skus in enumerate(page_skus):
+        skus_on_page = [sku for sku, _ in skus]
+        final_labels = []
+        for sku, qty in skus:
+            product_name = sku_map.get(sku, "Unknown Product")
+            if product_name == "OIL":
+                _count_pack(oil_counts, qty)
+            elif product_name == "Potli":
+                _count_pack(potli_counts, qty)
+
+            if sku == "TN0001":
+                # Add TN0001 if qty > 1, or if there is another SKU on the page
+                keep = qty > 1 or len(skus_on_page) > 1
+            elif sku == "TS-NLT5-CZ47":
+                # Only add TS-NLT5-CZ47 if qty > 1
+                keep = qty > 1
+            else:
+                keep = True
+
+            if keep:
+                final_labels.append(make_label(product_name, qty))
+            else:
+                skipped_special_skus[sku].append({"page": i, "qty": 1, "skus_on_page": skus_on_page})
+
+        if final_labels:
+            marked_pages.append((i, " | ".join(final_labels)))
+        else:
+            unmarked_pages.append(i)
+
+    return {
+        "marked_pages": marked_pages,
+        "unmarked_pages": unmarked_pages,
+        "skipped_special_skus": skipped_special_skus,
+        "oil_counts": oil_counts,
+        "potli_counts": potli_counts,
+    }
+
+
+def order_pages(classification: Dict) -> List[Tuple[int, Optional[str]]]:
+    """
+    Build the final page order: unmarked pages at the top, then all marked
+    pages and the grouped (no-SKU page, following SKU page) pairs at the bottom.
+    """
+    marked_pages = classification["marked_pages"]
+    unmarked_pages = classification["unmarked_pages"]
+    marked_dict = dict(marked_pages)
+    skipped = {entry["page"]
+               for entries in classification["skipped_special_skus"].values()
+               for entry in entries}
+
+    # Group no-SKU page and its following SKU page together at the end
+    grouped_pairs = []
+    used_pages = set()
+    i = 0
+    while i < len(unmarked_pages):
+        page = unmarked_pages[i]
+        # Only group if neither page nor next page are in skipped_special_skus
+        if (page + 1) in marked_dict and page not in skipped and (page + 1) not in skipped:
+            grouped_pairs.append((page, page + 1))
+            used_pages.add(page)
+            used_pages.add(page + 1)
+            i += 1  # skip next page as it's already grouped
+        i += 1
+
+    final_page_order: List[Tuple[int, Optional[str]]] = []
+    # Add all remaining unmarked pages first
+    final_page_order.extend((i, None) for i in unmarked_pages if i not in used_pages)
+    # Add all marked pages and grouped pairs at the bottom
+    final_page_order.extend((i, label) for i, label in marked_pages if i not in used_pages)
+    for no_sku, sku_page in grouped_pairs:
+        final_page_order.append((no_sku, None))
+        final_page_order.append((sku_page, marked_dict[sku_page]))
+    return final_page_order
+
+
+def page_runs(page_order: List[int]) -> List[Tuple[int, int]]:
+    """Split a page order into maximal runs of consecutive pages, as (first, last)."""
+    runs: List[Tuple[int, int]] = []
+    for page_num in page_order:
+        if runs and page_num == runs[-1][1] + 1:
+            runs[-1] = (runs[-1][0], page_num)
+        else:
+            runs.append((page_num, page_num))
+    return runs
+
+
+def copy_pages(doc: fitz.Document, page_order: List[int],
+               progress: Optional[ProgressFunc] = None) -> fitz.Document:
+    """
+    Return a new PDF with the pages of `doc` in `page_order`, one insert_pdf
+    per run. All runs share one graft map (final=False until the last run),
+    so fonts, logos and forms shared between pages are copied only once.
+    progress gets a "copy" event per run.
+    """
+    new_doc = fitz.open()
+    runs = page_runs(page_order)
+    try:
+        for n, (first, last) in enumerate(runs):
+            new_doc.insert_pdf(doc, from_page=first, to_page=last, final=(n == len(runs) - 1))
+            if progress is not None:
+                progress("copy", len(new_doc), len(page_order))
+    except Exception:
+        new_doc.close()
+        raise
+    return new_doc
+
+
+def stamp_labels(new_doc: fitz.Document, final_page_order: List[Tuple[int, Optional[str]]],
+                 stamp_points: Optional[Dict[int, Tuple[float, float]]] = None,
+                 label_layer: Optional[str] = None, progress: Optional[ProgressFunc] = None):
+    """
+    Stamp the labels onto the copied pages, by output index, at
+    stamp_points[source page] if given, else at LABEL_POINT. The label font
+    and each distinct label text are stored once per document. With
+    label_layer "on" or "off", all labels go into one optional content
+    group with that initial visibility. progress gets a "stamp" event per
+    label.
+    """
+    stamp_points = stamp_points or {}
+    layer_xref = new_doc.add_ocg(LABEL_LAYER_NAME, on=(label_layer == "on")) if label_layer else 0
+    stamper = LabelStamper(new_doc, fontname=LABEL_FONT, fontsize=LABEL_FONTSIZE, color=(0, 0, 0),
+                           layer_xref=layer_xref)
+    labels = sum(1 for _, label_text in final_page_order if label_text is not None)
+    stamped = 0
+    for out_index, (page_num, label_text) in enumerate(final_page_order):
+        if label_text is not None:
+            stamper.stamp(new_doc[out_index], stamp_points.get(page_num, LABEL_POINT), label_text)
+            stamped += 1
+            if progress is not None:
+                progress("stamp", stamped, labels)
+
+
+def save_document(out_doc: fitz.Document, output_path: str, save_profile: str = DEFAULT_SAVE_PROFILE):
+    """Save with the options of one of SAVE_PROFILES."""
+    options = dict(SAVE_PROFILES[save_profile])
+    if options.pop("subset_fonts", False):
+        out_doc.subset_fonts()
+    out_doc.save(output_path, **options)
+
+
+def build_output(doc: fitz.Document, final_page_order: List[Tuple[int, Optional[str]]],
+                 output_path: str, stamp_points: Optional[Dict[int, Tuple[float, float]]] = None,
+                 output_mode: str = DEFAULT_OUTPUT_MODE, save_profile: str = DEFAULT_SAVE_PROFILE,
+                 label_layer: Optional[str] = None, report: Optional[RunReport] = None,
+                 progress: Optional[ProgressFunc] = None):
+    """
+    Write the pages in the final order with their labels to output_path.
+
+    "copy" grafts the pages into a new PDF. "select" reorders `doc` itself
+    with one Document.select call and stamps it in place, so no objects are
+    copied; `doc` is left modified and should be closed afterwards.
+    save_profile names the save options (see SAVE_PROFILES) and label_layer
+    the optional labels layer (see stamp_labels). The copy, stamp and save
+    stages are timed into `report` if given, and reported to progress.
+    """
+    report = report or RunReport()
+    progress = progress or (lambda stage, done, total: None)
+    page_order = [page_num for page_num, _ in final_page_order]
+    labels = sum(1 for _, label_text in final_page_order if label_text is not None)
+    progress("copy", 0, len(page_order))
+    if output_mode == "select":
+        with report.stage("copy", len(page_order)):
+            doc.select(page_order)
+        out_doc = doc
+        progress("copy", len(page_order), len(page_order))
+    else:
+        with report.stage("copy", len(page_order)):
+            out_doc = copy_pages(doc, page_order, progress)
+    try:
+        with report.stage("stamp", labels):
+            stamp_labels(out_doc, final_page_order, stamp_points, label_layer, progress)
+        checkpoint()
+        # Saving is one call, so there is no progress until it is done
+        progress("save", 0, len(page_order))
+        with report.stage("save", len(page_order)):
+            save_document(out_doc, output_path, save_profile)
+        progress("save", len(page_order), len(page_order))
+        report.stages["save"]["bytes_written"] = os.path.getsize(output_path)
+    finally:
+        if out_doc is not doc:
+            out_doc.close()
+
+
+def build_output_streaming(input_path: str, page_xrefs: List[int],
+                           final_page_order: List[Tuple[int, Optional[str]]], output_path: str,
+                           stamp_points: Optional[Dict[int, Tuple[float, float]]] = None,
+                           save_profile: str = DEFAULT_SAVE_PROFILE, label_layer: Optional[str] = None,
+                           report: Optional[RunReport] = None, chunk_pages: int = STREAM_CHUNK_PAGES,
+                           progress: Optional[ProgressFunc] = None):
+    """
+    Like build_output in "copy" mode, but holding at most chunk_pages pages
+    in memory: each chunk is copied from a freshly opened source showing
+    only its pages (page_xrefs holds the xref of every source page), then
+    stamped and saved to a temporary file next to the output, and the chunk
+    files are joined into output_path at the end (see pdf_concat). Before a
+    page is copied its resources are trimmed to what it draws (see
+    content_stream.own_page_resources), so a chunk does not drag along the
+    forms and images of every other page. progress gets copy, stamp and
+    save events per chunk and concat events before and after joining.
+    """
+    report = report or RunReport()
+    progress = progress or (lambda stage, done, total: None)
+    total = len(final_page_order)
+    output_dir = os.path.dirname(os.path.abspath(output_path))
+    copy_seconds = stamp_seconds = save_seconds = 0.0
+    labels = 0
+    with tempfile.TemporaryDirectory(prefix="chunks_", dir=output_dir) as tmp_dir:
+        chunk_paths = []
+        for start in range(0, len(final_page_order), chunk_pages):
+            chunk = final_page_order[start:start + chunk_pages]
+            page_order = [page_num for page_num, _ in chunk]
+            chunk_path = os.path.join(tmp_dir, f"{len(chunk_paths):05d}.pdf")
+            copy_start = time.perf_counter()
+            chunk_xrefs = list(dict.fromkeys(page_xrefs[page_num] for page_num in page_order))
+            with fitz.open(input_path) as src:
+                for page_xref in chunk_xrefs:
+                    own_page_resources(src, page_xref)
+                show_only_pages(src, chunk_xrefs)
+                position = {page_xref: n for n, page_xref in enumerate(chunk_xrefs)}
+                out_doc = copy_pages(src, [position[page_xrefs[page_num]] for page_num in page_order])
+            done = start + len(chunk)
+            progress("copy", done, total)
+            try:
+                stamp_start = time.perf_counter()
+                stamp_labels(out_doc, chunk, stamp_points, label_layer)
+                progress("stamp", done, total)
+                save_start = time.perf_counter()
+                save_document(out_doc, chunk_path, save_profile)
+                progress("save", done, total)
+            finally:
+                out_doc.close()
+            fitz.TOOLS.store_shrink(100)
+            checkpoint()
+            copy_seconds += stamp_start - copy_start
+            stamp_seconds += save_start - stamp_start
+            save_seconds += time.perf_counter() - save_start
+            labels += sum(1 for _, label_text in chunk if label_text is not None)
+            chunk_paths.append(chunk_path)
+        report.add("copy", copy_seconds, len(final_page_order), chunks=len(chunk_paths))
+        report.add("stamp", stamp_seconds, labels)
+        report.add("save", save_seconds, len(final_page_order))
+        progress("concat", 0, total)
+        with report.stage("concat", len(final_page_order)):
+            concat_pdfs(chunk_paths, output_path)
+        progress("concat", total, total)
+    report.stages["concat"]["bytes_written"] = os.path.getsize(output_path)
+
+
+def output_config(sku_map: Dict[str, str], extract_mode: str, output_mode: str, save_profile: str,
+                  label_layer: Optional[str], streaming: bool, chunk_pages: int) -> Dict:
+    """Everything besides the input's bytes that decides the output file of a run."""
+    return {
+        "versions": [OUTPUT_VERSION, PARSER_VERSION, fitz.VersionBind],
+        "sku_map": sku_map,
+        "special_skus": SPECIAL_SKUS,
+        "label": [LABEL_POINT, LABEL_FONT, LABEL_FONTSIZE],
+        "extract_mode": extract_mode,
+        "output_mode": "streaming" if streaming else output_mode,
+        "chunk_pages": chunk_pages if streaming else None,
+        "save_options": SAVE_PROFILES[save_profile],
+        "label_layer": label_layer,
+    }
+
+
+def _cached_result(results: ResultCache, key: str, input_path: str, output_path: str,
+                   report_path: Optional[str], log: LogFunc) -> Optional[Dict]:
+    start = time.perf_counter()
+    summary = results.get(key, output_path)
+    if summary is None:
+        return None
+    # JSON turned the pack sizes into strings
+    for counts in ("oil_counts", "potli_counts"):
+        summary[counts] = {int(size) if size.isdigit() else size: n for size, n in summary[counts].items()}
+    summary.update(input=input_path, output=output_path, cached=True)
+    log(f"Same manifest and settings as the run of {summary['report']['started_at'].replace('T', ' ')}: "
+        f"output copied from the result cache in {time.perf_counter() - start:.2f} s")
+    log(f"Successfully saved to: {output_path} ({summary['bytes_written'] / 1e6:.1f} MB)")
+    if report_path:
+        write_report(summary["report"], report_path)
+    return summary
+
+
+def process_pdf(input_path: str, output_path: str, sku_map: Optional[Dict[str, str]] = None,
+                log: LogFunc = print, workers: int = 1, executor: Optional[Executor] = None,
+                extract_mode: str = DEFAULT_EXTRACT_MODE, output_mode: str = DEFAULT_OUTPUT_MODE,
+                save_profile: str = DEFAULT_SAVE_PROFILE, label_layer: Optional[str] = None,
+                report_path: Optional[str] = None, profile: bool = False, streaming: bool = False,
+                chunk_pages: int = STREAM_CHUNK_PAGES, page_cache: Optional[str] = None,
+                result_cache: Optional[str] = None, progress: Optional[ProgressFunc] = None,
+                cancelled: Optional[CancelFunc] = None, keep_pages: bool = False) -> Dict:
+    """
+    Process one manifest end to end and return a summary of the run.
+
+    With workers > 1, text extraction is sharded across a process pool.
+    Pass an existing executor to reuse warm worker processes across files.
+    extract_mode picks the page text reader (see EXTRACT_MODES), output_mode
+    how the output is built (see build_output), save_profile the save
+    options (see SAVE_PROFILES) and label_layer whether labels go into a
+    switchable layer (see stamp_labels).
+
+    Stage timings are logged, returned as summary["report"] and, with
+    report_path, written there as JSON (see run_report.RunReport). With
+    profile, the run is profiled with cProfile and tracemalloc and the
+    results are written next to the output (see run_profiler).
+
+    With streaming, pages are classified as they are read and the output is
+    built in chunks of chunk_pages (see build_output_streaming), so peak
+    memory barely grows with the manifest size; output_mode is ignored.
+
+    page_cache is the path of a page cache database (see page_cache): pages
+    read before, in this or any other manifest, are not read again.
+    result_cache is a directory of recent results (see result_cache): if the
+    same input bytes were processed with the same settings, the earlier
+    output is copied to output_path and the earlier summary returned, with
+    summary["cached"] set.
+
+    progress is called with (stage, pages done, pages in the stage) as the
+    run goes through extract, copy, stamp, save and, when streaming,
+    concat, throttled by run_progress.ProgressReporter. cancelled is checked
+    at each of those events; once it returns True the run stops with
+    run_progress.RunCancelled.
+
+    With keep_pages, the SKUs read from each page are kept in memory (see
+    kept_pages), so running the same manifest again, also after a cancelled
+    run, only reads the pages not read before.
+    """
+    if profile:
+        with profile_run(output_path) as profile_files:
+            summary = process_pdf(input_path, output_path, sku_map, log, workers, executor, extract_mode,
+                                  output_mode, save_profile, label_layer, report_path,
+                                  streaming=streaming, chunk_pages=chunk_pages, page_cache=page_cache,
+                                  result_cache=result_cache, progress=progress, cancelled=cancelled,
+                                  keep_pages=keep_pages)
+        log(f"Profile written to: {profile_files[0]} (summary: {profile_files[1]})")
+        summary["profile"] = profile_files
+        return summary
+
+    if sku_map is None:
+        sku_map = DEFAULT_SKU_MAP
+    if progress is not None or cancelled is not None:
+        progress = ProgressReporter(progress, cancelled=cancelled)
+    results = result_key = None
+    if result_cache:
+        try:
+            results = ResultCache(result_cache)
+            result_key = run_key(input_path, output_config(sku_map, extract_mode, output_mode, save_profile,
+                                                            label_layer, streaming, chunk_pages))
+            summary = _cached_result(results, result_key, input_path, output_path, report_path, log)
+            if summary is not None:
+                return summary
+        except OSError:
+            # Without the cache the run just takes its usual time
+            results = None
+    report = RunReport(input_path, output_path, {
+        "extract_mode": extract_mode, "output_mode": output_mode, "save_profile": save_profile,
+        "label_layer": label_layer, "workers": workers, "streaming": streaming,
+        "page_cache": bool(page_cache),
+    })
+
+    log("Starting PDF processing...")
+    with report.stage("open"):
+        doc = fitz.open(input_path)
+    try:
+        log(f"Opened PDF with {len(doc)} pages")
+        page_count = len(doc)
+        report.stages["open"]["pages"] = page_count
+        timings: Dict[str, float] = {}
+        # Streaming runs find their pages by xref in chunk-sized opens of the file
+        page_xrefs = [doc.page_xref(i) for i in range(page_count)] if streaming else []
+        kept = kept_pages(input_path, extract_mode) if keep_pages else None
+        read_before = list(kept or [])
+        parallel = workers > 1 and page_count - len(read_before) >= 2 * MIN_SHARD_PAGES
+        # Worker processes open the page cache themselves
+        cache = open_page_cache(page_cache) if not parallel else None
+        try:
+            if read_before:
+                log(f"{len(read_before)} of {page_count} pages already read in an earlier run")
+            if parallel:
+                log(f"Extracting text with {workers} worker processes...")
+                pool = executor or ProcessPoolExecutor(max_workers=workers)
+                try:
+                    # Only the pages not read before; each shard is kept as it arrives
+                    new_pages = iter_page_skus_parallel(input_path, page_count, pool, workers, extract_mode,
+                                                        timings, page_cache, progress, len(read_before))
+                    if kept is not None:
+                        new_pages = _keep(new_pages, kept)
+                    page_skus = read_before + list(new_pages)
+                finally:
+                    if pool is not executor:
+                        pool.shutdown()
+            elif streaming:
+                # Pages are classified as they are read, from chunk-sized opens of
+                # the file (see stream_page_skus); classify gets the rest of the time
+                doc.close()
+                new_pages = stream_page_skus(input_path, page_xrefs[len(read_before):], extract_mode, timings,
+                                             chunk_pages, cache)
+                if kept is not None:
+                    new_pages = _keep(new_pages, kept)
+                page_skus = track_pages(chain(read_before, new_pages), page_count, progress)
+            else:
+                new_pages = iter_page_skus(doc, range(len(read_before), page_count), extract_mode, timings,
+                                           cache=cache)
+                if kept is not None:
+                    new_pages = _keep(new_pages, kept)
+                page_skus = list(track_pages(chain(read_before, new_pages), page_count, progress))
+
+            checkpoint()
+            classify_start = time.perf_counter()
+            classification = classify_pages(page_skus, sku_map)
+        finally:
+            if cache is not None:
+                cache.close()
+        if streaming and not parallel:
+            classify_start += timings.get("extract", 0.0) + timings.get("parse", 0.0)
+        extra = {"workers": workers} if parallel else {}
+        # Pages kept from an earlier run were not read again
+        read_pages = page_count - len(read_before)
+        for name in ("extract", "parse"):
+            report.add(name, timings.get(name, 0.0), read_pages, **extra)
+        if read_before:
+            report.stages["extract"]["kept_pages"] = len(read_before)
+        if page_cache:
+            cached_pages = int(timings.get("cached_pages", 0))
+            report.stages["extract"]["cached_pages"] = cached_pages
+            log(f"Page cache: {cached_pages} of {read_pages} pages read before")
+        oil_counts = classification["oil_counts"]
+        potli_counts = classification["potli_counts"]
+        log(f"Found {len(classification['marked_pages'])} marked pages and "
+            f"{len(classification['unmarked_pages'])} unmarked pages")
+        log(f"OIL counts: pack of 1x={oil_counts[1]}, pack of 2x={oil_counts[2]}, pack of 3x={oil_counts[3]}, morex={oil_counts['more']}")
+        log(f"Potli counts: pack of 1x={potli_counts[1]}, pack of 2x={potli_counts[2]}, pack of 3x={potli_counts[3]}, morex={potli_counts['more']}")
+
+        final_page_order = order_pages(classification)
+        report.add("classify", time.perf_counter() - classify_start, page_count)
+
+        stamp_points = None
+        if extract_mode == "template":
+            # Stamp where the page's layout template has room for the label
+            with report.stage("stamp"):
+                templates = get_template_cache()
+                if doc.is_closed:
+                    doc = fitz.open(input_path)
+                stamp_points = {page_num: templates.stamp_point(doc[page_num])
+                                for page_num, label_text in final_page_order if label_text is not None}
+                templates.save()
+
+        if streaming:
+            log(f"Copying pages in new grouped order, {chunk_pages} pages at a time...")
+            # Each chunk opens the source afresh
+            if not doc.is_closed:
+                doc.close()
+            build_output_streaming(input_path, page_xrefs, final_page_order, output_path, stamp_points,
+                                   save_profile, label_layer, report, chunk_pages, progress)
+        elif output_mode == "select":
+            log("Reordering pages in place...")
+            build_output(doc, final_page_order, output_path, stamp_points, output_mode, save_profile,
+                         label_layer, report, progress)
+        else:
+            log("Copying pages in new grouped order...")
+            build_output(doc, final_page_order, output_path, stamp_points, output_mode, save_profile,
+                         label_layer, report, progress)
+        bytes_written = os.path.getsize(output_path)
+        log(f"Successfully saved to: {output_path} ({bytes_written / 1e6:.1f} MB)")
+    finally:
+        if not doc.is_closed:
+            doc.close()
+
+    report.finish(page_count, bytes_written)
+    for line in report.log_lines():
+        log(line)
+    if report_path:
+        report.write(report_path)
+
+    summary = {
+        "input": input_path,
+        "output": output_path,
+        "pages": page_count,
+        "marked": len(classification["marked_pages"]),
+        "unmarked": len(classification["unmarked_pages"]),
+        "oil_counts": oil_counts,
+        "potli_counts": potli_counts,
+        "bytes_written": bytes_written,
+        "page_order": [page_num for page_num, _ in final_page_order],
+        "report": report.to_dict(),
+        "cached": False,
+    }
+    if results is not None:
+        results.put(result_key, output_path, summary)
+    return summary
+
+
+def default_output_path(input_path: str, output_dir: Optional[str] = None) -> str:
+    base_name = os.path.splitext(input_path)[0]
+    output_path = f"{base_name}{OUTPUT_SUFFIX}"
+    if output_dir:
+        output_path = os.path.join(output_dir, os.path.basename(output_path))
+    return output_path
+
+
+def collect_inputs(paths: List[str]) -> List[str]:
+    """Expand directories into the manifests they contain, skipping earlier outputs."""
+    inputs = []
+    for path in paths:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if name.lower().endswith(".pdf") and not name.endswith(OUTPUT_SUFFIX):
+                    inputs.append(os.path.join(path, name))
+        else:
+            inputs.append(path)
+    return inputs
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Reorder and label Shiprocket manifest PDFs.")
+    parser.add_argument("paths", nargs="+", help="input PDF files or directories of PDFs")
+    parser.add_argument("-o", "--output", help="output PDF path (single input only)")
+    parser.add_argument("--output-dir", help="directory for processed PDFs (default: next to the input)")
+    parser.add_argument("--sku-map", help="JSON file with extra SKU to product name entries")
+    parser.add_argument("-j", "--workers", type=int, default=1,
+                        help="processes for text extraction (0 = all cores, default: 1)")
+    parser.add_argument("--extract", choices=EXTRACT_MODES, default=DEFAULT_EXTRACT_MODE,
+                        help="page text reader: raw content-stream scan with get_text() fallback, "
+                             "whole page, only the rows around 'SKU:', or by the cached SKU/Qty "
+                             "columns of the page's layout template (default: content)")
+    parser.add_argument("--output-mode", choices=OUTPUT_MODES, default=DEFAULT_OUTPUT_MODE,
+                        help="build the output by copying pages into a new PDF, or by reordering "
+                             "the source pages in place (default: copy)")
+    parser.add_argument("--save-profile", choices=sorted(SAVE_PROFILES), default=DEFAULT_SAVE_PROFILE,
+                        help="fast (quickest save), balanced or compact (smallest file) "
+                             "(default: %(default)s)")
+    parser.add_argument("--label-layer", choices=LABEL_LAYER_STATES,
+                        help=f"put all labels in a '{LABEL_LAYER_NAME}' layer that viewers can "
+                             "switch off, initially shown (on) or hidden (off)")
+    parser.add_argument("--report", action="store_true",
+                        help="write stage timings as JSON next to each output (<output>_report.json)")
+    parser.add_argument("--profile", action="store_true",
+                        help="profile each run with cProfile and tracemalloc; writes <output>_profile.prof "
+                             "and a summary, <output>_profile.txt")
+    parser.add_argument("--streaming", action="store_true",
+                        help="low-memory mode for very large manifests: classify pages as they are read "
+                             f"and write the output in chunks of --chunk-pages pages (default: {STREAM_CHUNK_PAGES})")
+    parser.add_argument("--chunk-pages", type=int, default=STREAM_CHUNK_PAGES,
+                        help="output pages held in memory at once with --streaming")
+    parser.add_argument("--page-cache", default=DEFAULT_PAGE_CACHE_PATH,
+                        help="database of SKUs already read from pages, so re-runs and overlapping "
+                             "manifests skip text extraction for them (default: %(default)s)")
+    parser.add_argument("--no-page-cache", dest="page_cache", action="store_const", const=None,
+                        help="read every page, without using or updating the page cache")
+    parser.add_argument("--result-cache", default=DEFAULT_RESULT_CACHE_DIR,
+                        help="directory of recent outputs; an identical manifest processed with the same "
+                             "settings is copied from there instead of processed (default: %(default)s)")
+    parser.add_argument("--no-result-cache", dest="result_cache", action="store_const", const=None,
+                        help="always process, without using or updating the result cache")
+    parser.add_argument("-q", "--quiet", action="store_true", help="only print errors and the final summary")
+    args = parser.parse_args(argv)
+
+    inputs = collect_inputs(args.paths)
+    if not inputs:
+        parser.error("no input PDF files found")
+    if args.output and len(inputs) > 1:
+        parser.error("--output can only be used with a single input file")
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+
+    sku_map = load_sku_map(args.sku_map)
+    log = (lambda message: None) if args.quiet else print
+
+    workers = resolve_workers(args.workers)
+    # One pool for the whole batch so worker processes stay warm between files
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+
+    failures = 0
+    try:
+        for input_path in inputs:
+            output_path = args.output or default_output_path(input_path, args.output_dir)
+            try:
+                summary = process_pdf(input_path, output_path, sku_map=sku_map, log=log,
+                                      workers=workers, executor=executor, extract_mode=args.extract,
+                                      output_mode=args.output_mode, save_profile=args.save_profile,
+                                      label_layer=args.label_layer,
+                                      report_path=default_report_path(output_path) if args.report else None,
+                                      profile=args.profile, streaming=args.streaming,
+                                      chunk_pages=args.chunk_pages, page_cache=args.page_cache,
+                                      result_cache=args.result_cache)
+                print(f"✓ {input_path}: {summary['pages']} pages, {summary['marked']} marked -> {output_path} "
+                      f"({summary['bytes_written'] / 1e6:.1f} MB)")
+            except Exception as e:
+                failures += 1
+                print(f"✗ {input_path}: {e}", file=sys.stderr)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    if len(inputs) > 1:
+        print(f"Processed {len(inputs) - failures}/{len(inputs)} files")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    # Needed for worker processes in frozen (PyInstaller) builds on Windows
+    multiprocessing.freeze_support()
+    sys.exit(main())
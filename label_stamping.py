@@ -0,0 +1,130 @@
+"""
+Label Stamping
+Stamps product labels onto output pages while sharing resources between
+pages: the label font is registered once per document, each distinct
+label text becomes one Form XObject, and the page content that places a
+form at a given spot is one stream object shared by every page using it.
+"""
+
+from typing import Dict, Optional, Tuple
+
+import fitz  # PyMuPDF
+
+# Base14 fonts are encoded WinAnsi; characters outside it (such as the
+# "→" in labels) print as a middle dot, as Page.insert_text does
+FALLBACK_CHAR = 0xB7
+# Courier glyphs are all 600/1000 em wide
+COURIER_ADVANCE = 0.6
+
+FORM_NAME = "LabelStamp{}"
+
+
+def encode_label(text: str) -> bytes:
+    return bytes(ord(ch) if ord(ch) < 256 else FALLBACK_CHAR for ch in text)
+
+
+class LabelStamper:
+    """Stamps labels on the pages of one output document."""
+
+    def __init__(self, doc: fitz.Document, fontname: str = "Courier-Bold", fontsize: float = 12,
+                 color: Tuple[float, float, float] = (0, 0, 0), layer_xref: int = 0):
+        """layer_xref: optional content group (from Document.add_ocg) for all labels."""
+        self.doc = doc
+        self.layer_xref = layer_xref
+        self.fontname = fontname
+        self.fontsize = fontsize
+        self.color = color
+        self._font_xref = 0
+        self._forms: Dict[str, Tuple[str, int]] = {}
+        self._placements: Dict[Tuple[str, float, float], int] = {}
+        self._wrap_xrefs: Optional[Tuple[int, int]] = None
+
+    def _new_stream(self, obj: str, stream: bytes) -> int:
+        xref = self.doc.get_new_xref()
+        self.doc.update_object(xref, obj)
+        self.doc.update_stream(xref, stream)
+        return xref
+
+    def _font(self) -> int:
+        # One font object for every label in the document
+        if not self._font_xref:
+            self._font_xref = self.doc.get_new_xref()
+            self.doc.update_object(self._font_xref,
+                                   f"<</Type/Font/Subtype/Type1/BaseFont/{self.fontname}"
+                                   f"/Encoding/WinAnsiEncoding>>")
+        return self._font_xref
+
+    def _form(self, label_text: str) -> Tuple[str, int]:
+        """Return (resource name, xref) of the Form XObject drawing `label_text`."""
+        form = self._forms.get(label_text)
+        if form is None:
+            encoded = encode_label(label_text)
+            width = len(encoded) * COURIER_ADVANCE * self.fontsize
+            r, g, b = self.color
+            stream = (f"BT /LabelFont {self.fontsize:g} Tf {r:g} {g:g} {b:g} rg 0 0 Td <".encode()
+                      + encoded.hex().encode() + b"> Tj ET")
+            layer = f"/OC {self.layer_xref} 0 R" if self.layer_xref else ""
+            xref = self._new_stream(
+                f"<</Type/XObject/Subtype/Form/BBox[0 {-self.fontsize / 4:g} {width:g} {self.fontsize:g}]"
+                f"/Resources<</Font<</LabelFont {self._font()} 0 R>>>>{layer}>>",
+                stream)
+            form = (FORM_NAME.format(len(self._forms)), xref)
+            self._forms[label_text] = form
+        return form
+
+    def _placement(self, name: str, x: float, y: float) -> int:
+        # Pages with the same label at the same spot share one content stream
+        key = (name, x, y)
+        xref = self._placements.get(key)
+        if xref is None:
+            xref = self._new_stream("<<>>", f"q 1 0 0 1 {x:g} {y:g} cm /{name} Do Q".encode())
+            self._placements[key] = xref
+        return xref
+
+    def _wrap(self) -> Tuple[int, int]:
+        # Shared "q" / "Q" streams that isolate the page's own graphics state
+        if self._wrap_xrefs is None:
+            self._wrap_xrefs = (self._new_stream("<<>>", b"q\n"), self._new_stream("<<>>", b"\nQ\n"))
+        return self._wrap_xrefs
+
+    def _inherited_resources(self, page: fitz.Page) -> str:
+        xref = page.xref
+        while xref:
+            kind, value = self.doc.xref_get_key(xref, "Resources")
+            if kind in ("xref", "dict"):
+                return value
+            kind, parent = self.doc.xref_get_key(xref, "Parent")
+            xref = int(parent.split()[0]) if kind == "xref" else 0
+        return "<<>>"
+
+    def _add_xobject(self, page: fitz.Page, name: str, xref: int):
+        """Add /name to the page's XObject resources, following indirect dictionaries."""
+        doc = self.doc
+        kind, value = doc.xref_get_key(page.xref, "Resources")
+        if kind == "null":
+            # Resources inherited from the page tree: give the page its own reference
+            value = self._inherited_resources(page)
+            doc.xref_set_key(page.xref, "Resources", value)
+            kind = "xref" if value.endswith(" R") else "dict"
+        holder, path = (int(value.split()[0]), "") if kind == "xref" else (page.xref, "Resources/")
+        kind, value = doc.xref_get_key(holder, path + "XObject")
+        if kind == "xref":
+            holder, path = int(value.split()[0]), ""
+        else:
+            path += "XObject/"
+        doc.xref_set_key(holder, path + name, f"{xref} 0 R")
+
+    def stamp(self, page: fitz.Page, point: Tuple[float, float], label_text: str):
+        """Stamp `label_text` with its baseline starting at `point` (page coordinates)."""
+        name, form_xref = self._form(label_text)
+        # Page coordinates have y going down; PDF user space has it going up
+        pdf_point = fitz.Point(point) * ~page.transformation_matrix
+        placement_xref = self._placement(name, round(pdf_point.x, 3), round(pdf_point.y, 3))
+
+        self._add_xobject(page, name, form_xref)
+        contents = page.get_contents()
+        if not page.is_wrapped:
+            q_xref, end_q_xref = self._wrap()
+            contents = [q_xref] + contents + [end_q_xref]
+        contents.append(placement_xref)
+        self.doc.xref_set_key(page.xref, "Contents", "[" + " ".join(f"{xref} 0 R" for xref in contents) + "]")
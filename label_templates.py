@@ -0,0 +1,142 @@
+"""
+Label Layout Templates
+Shiprocket manifests use a handful of fixed label layouts. This module
+fingerprints a page's layout from cheap features (page size, fonts and
+where the fixed table headers are drawn) and caches, per layout, the
+columns holding SKUs and quantities and a free spot for the label stamp.
+"""
+
+import hashlib
+import json
+import os
+import re
+from typing import Dict, List, Optional, Tuple
+
+import fitz  # PyMuPDF
+
+from content_stream import page_streams, stream_font_names
+
+DEFAULT_TEMPLATES_PATH = os.path.join(os.path.expanduser("~"), ".shiprocket_labels", "templates.json")
+
+# Fixed product table headers, as drawn in the raw content stream, e.g.
+# "BT 92.644 156.873 Td /F5 6.8 Tf  [(Qty)] TJ ET"
+HEADER_TEXT = re.compile(rb'(-?[\d.]+)\s+-?[\d.]+\s+Td\s*/[^\s/]+\s+[\d.]+\s+Tf\s*\[?\((HSN|Qty|Unit Price|IGST|CGST)\)')
+
+# Extra room left of the "Qty" header, where right-aligned numbers start
+QTY_SLACK = 4.0
+
+# Nominal stamp box: about 24 characters of 12pt Courier
+STAMP_WIDTH = 175.0
+# How far up or down the stamp may move to find a free band
+STAMP_SEARCH_RANGE = 120
+
+# A template plan is a dict with "sku_column" and "qty_column" as [x0, x1]
+# (None if the layout has no product table) and "stamp_point" as [x, y]
+Plan = Dict[str, Optional[List[float]]]
+
+
+def fingerprint(page: fitz.Page) -> str:
+    """Identify the page's layout without extracting its text."""
+    doc = page.parent
+    fonts = set()
+    headers = []
+    for holder_xref, stream in page_streams(page):
+        fonts.update(stream_font_names(doc, holder_xref))
+        for match in HEADER_TEXT.finditer(stream):
+            headers.append(f"{match.group(2).decode()}@{float(match.group(1)):.0f}")
+    key = "|".join([
+        f"{page.rect.width:.0f}x{page.rect.height:.0f}",
+        ",".join(sorted(fonts)),
+        ",".join(headers),
+    ])
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+
+
+def _first_word(words: List[Tuple], text: str) -> Optional[Tuple]:
+    for word in words:
+        if word[4] == text:
+            return word
+    return None
+
+
+def _learn_columns(words: List[Tuple]) -> Tuple[Optional[List[float]], Optional[List[float]]]:
+    qty = _first_word(words, "Qty")
+    if qty is None:
+        return None, None
+    hsn = _first_word(words, "HSN")
+    unit = _first_word(words, "Unit")
+    sku_column = [0.0, (hsn or qty)[0]]
+    qty_right = unit[0] if unit is not None and unit[0] > qty[2] else qty[2] + 10
+    qty_column = [qty[0] - QTY_SLACK, qty_right]
+    return sku_column, qty_column
+
+
+def _learn_stamp_point(page: fitz.Page, words: List[Tuple], default: Tuple[float, float],
+                       fontsize: float) -> List[float]:
+    """Keep the default stamp spot if it is free, else the nearest free band."""
+    x, y = default
+    word_rects = [fitz.Rect(w[:4]) for w in words]
+
+    def is_free(baseline):
+        box = fitz.Rect(x, baseline - fontsize, x + STAMP_WIDTH, baseline + fontsize / 4)
+        return box in page.rect and not any(box.intersects(r) for r in word_rects)
+
+    for offset in range(0, STAMP_SEARCH_RANGE + 1, 2):
+        for baseline in (y + offset, y - offset):
+            if is_free(baseline):
+                return [x, baseline]
+    return [x, y]
+
+
+class TemplateCache:
+    """Per-layout plans, learned on first sight and persisted as JSON."""
+
+    def __init__(self, path: Optional[str] = DEFAULT_TEMPLATES_PATH,
+                 default_stamp: Tuple[float, float] = (5, 250), stamp_fontsize: float = 12):
+        self.path = path
+        self.default_stamp = default_stamp
+        self.stamp_fontsize = stamp_fontsize
+        self.plans: Dict[str, Plan] = {}
+        self.dirty = False
+        if path and os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self.plans = json.load(f)
+            except (OSError, ValueError):
+                # A damaged cache only costs relearning
+                self.plans = {}
+
+    def known_plan(self, page: fitz.Page) -> Optional[Plan]:
+        """Return the plan for the page's layout if it was learned before."""
+        return self.plans.get(fingerprint(page))
+
+    def plan_for(self, page: fitz.Page, words: Optional[List[Tuple]] = None) -> Plan:
+        """Return the plan for the page's layout, learning it from `words` if new."""
+        key = fingerprint(page)
+        plan = self.plans.get(key)
+        if plan is None:
+            if words is None:
+                words = page.get_text("words")
+            sku_column, qty_column = _learn_columns(words)
+            plan = {
+                "sku_column": sku_column,
+                "qty_column": qty_column,
+                "stamp_point": _learn_stamp_point(page, words, self.default_stamp, self.stamp_fontsize),
+            }
+            self.plans[key] = plan
+            self.dirty = True
+        return plan
+
+    def stamp_point(self, page: fitz.Page) -> Tuple[float, float]:
+        x, y = self.plan_for(page)["stamp_point"]
+        return x, y
+
+    def save(self):
+        if not self.dirty or not self.path:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.plans, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+        self.dirty = False
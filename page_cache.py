@@ -0,0 +1,135 @@
+"""
+Page Classification Cache
+Remembers the SKU/quantity pairs read from each page in an SQLite
+database, keyed by a hash of the page's content streams, so re-running a
+manifest (or one overlapping an earlier one) skips text extraction for
+every page already seen. Least recently used pages are evicted once the
+entries pass a size limit.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+DEFAULT_PAGE_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".shiprocket_labels", "pages.sqlite")
+
+# Size limit of the stored entries (keys plus SKU lists, about 60 bytes a
+# page); eviction trims them to EVICT_TO of the limit
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+EVICT_TO = 0.8
+
+# Seconds to wait for another process (e.g. an extraction worker) that
+# is writing to the database
+LOCK_TIMEOUT = 30
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    key BLOB PRIMARY KEY,
+    skus TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    used REAL NOT NULL
+)
+"""
+
+PageSkus = List[Tuple[str, int]]
+
+
+def page_key(streams: Iterable[bytes], namespace: str = "") -> bytes:
+    """
+    Hash a page's decompressed content streams (its own and those of the
+    forms it draws). `namespace` separates results that depend on more than
+    the streams, such as the extract mode and parser version.
+    """
+    digest = hashlib.blake2b(namespace.encode("utf-8"), digest_size=16)
+    for stream in streams:
+        # Length prefix so that stream boundaries count
+        digest.update(len(stream).to_bytes(8, "little"))
+        digest.update(stream)
+    return digest.digest()
+
+
+class PageCache:
+    """SKU/quantity pairs by page key, written in one transaction per flush."""
+
+    def __init__(self, path: str = DEFAULT_PAGE_CACHE_PATH, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._new: Dict[bytes, str] = {}
+        self._used: List[bytes] = []
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        try:
+            self._db = self._connect()
+        except sqlite3.OperationalError:
+            # Locked past LOCK_TIMEOUT or unreadable, not damaged: keep the
+            # file and let the caller run without the cache
+            raise
+        except sqlite3.DatabaseError:
+            # A damaged cache only costs re-extracting
+            os.remove(path)
+            self._db = self._connect()
+
+    def _connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self.path, timeout=LOCK_TIMEOUT)
+        try:
+            db.execute(SCHEMA)
+            db.commit()
+        except sqlite3.DatabaseError:
+            db.close()
+            raise
+        return db
+
+    def get(self, key: bytes) -> Optional[PageSkus]:
+        skus = self._new.get(key)
+        if skus is None:
+            row = self._db.execute("SELECT skus FROM pages WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            skus = row[0]
+            self._used.append(key)
+        self.hits += 1
+        return [(sku, qty) for sku, qty in json.loads(skus)]
+
+    def put(self, key: bytes, page_skus: PageSkus):
+        self._new[key] = json.dumps(page_skus, separators=(",", ":"))
+
+    def flush(self):
+        """Write new entries and last-use times, then evict if over the limit."""
+        if not self._new and not self._used:
+            return
+        now = time.time()
+        with self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO pages (key, skus, size, used) VALUES (?, ?, ?, ?)",
+                [(key, skus, len(key) + len(skus), now) for key, skus in self._new.items()])
+            self._db.executemany("UPDATE pages SET used = ? WHERE key = ?",
+                                 [(now, key) for key in self._used])
+        self._new.clear()
+        self._used.clear()
+        self.evict()
+
+    def evict(self):
+        """Drop least recently used entries until they fit in EVICT_TO of max_bytes."""
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        excess = total - int(self.max_bytes * EVICT_TO)
+        victims = []
+        for key, size in self._db.execute("SELECT key, size FROM pages ORDER BY used"):
+            if excess <= 0:
+                break
+            victims.append((key,))
+            excess -= size
+        with self._db:
+            self._db.executemany("DELETE FROM pages WHERE key = ?", victims)
+
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            self._db.close()
@@ -0,0 +1,121 @@
+"""
+PDF Concatenation
+Joins PDF files page after page by copying their objects straight into
+the output file, one input at a time, so memory use does not grow with
+the total page count the way Document.insert_pdf into one document does.
+"""
+
+import re
+from typing import Dict, List, Optional
+
+import fitz  # PyMuPDF
+
+# Indirect references, skipping over literal and hex strings that might
+# contain something looking like one
+TOKEN = re.compile(r'\((?:[^()\\]|\\.)*\)|<[0-9A-Fa-f\s]*>|(\d+)\s+(\d+)\s+R\b', re.S)
+REFERENCE = re.compile(r'(\d+)\s+0\s+R')
+LENGTH = re.compile(r'/Length\s+\d+(?:\s+\d+\s+R)?')
+
+CATALOG_NUMBER = 1
+PAGES_NUMBER = 2
+
+
+def _renumber(text: str, mapping: Dict[int, int]) -> str:
+    def replace(match):
+        if match.group(1) is None:
+            return match.group(0)
+        number = mapping.get(int(match.group(1)))
+        return f"{number} 0 R" if number is not None else "null"
+    return TOKEN.sub(replace, text)
+
+
+class _Writer:
+    def __init__(self, f):
+        self.f = f
+        self.offsets: Dict[int, int] = {}
+        f.write(b"%PDF-1.7\n%\xe2\xe3\xcf\xd3\n")
+
+    def write(self, number: int, text: str, stream: Optional[bytes] = None):
+        self.offsets[number] = self.f.tell()
+        self.f.write(f"{number} 0 obj\n{text}\n".encode("latin-1"))
+        if stream is not None:
+            self.f.write(b"stream\n" + stream + b"\nendstream\n")
+        self.f.write(b"endobj\n")
+
+    def finish(self):
+        xref_offset = self.f.tell()
+        size = max(self.offsets) + 1
+        self.f.write(b"xref\n0 %d\n0000000000 65535 f \n" % size)
+        for number in range(1, size):
+            offset = self.offsets.get(number)
+            self.f.write(b"%010d 00000 n \n" % offset if offset is not None else b"0000000000 65535 f \n")
+        self.f.write(b"trailer\n<</Size %d/Root %d 0 R>>\nstartxref\n%d\n%%%%EOF\n"
+                     % (size, CATALOG_NUMBER, xref_offset))
+
+
+def concat_pdfs(paths: List[str], output_path: str):
+    """
+    Write the pages of all `paths`, in order, to output_path. The optional
+    content groups of the inputs are merged by name, so a layer stamped
+    into every input stays one layer. Other document-level entries
+    (outlines, forms, metadata) are not carried over.
+    """
+    page_numbers: List[int] = []
+    layers: Dict[str, int] = {}
+    oc_properties = None
+    next_number = PAGES_NUMBER + 1
+    with open(output_path, 'wb') as f:
+        writer = _Writer(f)
+        for path in paths:
+            with fitz.open(path) as doc:
+                catalog = doc.pdf_catalog()
+                mapping: Dict[int, int] = {catalog: CATALOG_NUMBER}
+                skipped = {catalog}
+                kind, ocgs = doc.xref_get_key(catalog, "OCProperties/OCGs")
+                ocg_xrefs = [int(ref) for ref in REFERENCE.findall(ocgs)] if kind == "array" else []
+                # Optional content groups already written for an earlier input
+                for xref in ocg_xrefs:
+                    name = doc.xref_get_key(xref, "Name")[1]
+                    if name in layers:
+                        mapping[xref] = layers[name]
+                        skipped.add(xref)
+                for xref in range(1, doc.xref_length()):
+                    if xref in mapping:
+                        continue
+                    object_type = doc.xref_get_key(xref, "Type")[1]
+                    if object_type == "/Pages":
+                        # Page tree nodes collapse into the output's one node
+                        mapping[xref] = PAGES_NUMBER
+                        skipped.add(xref)
+                    elif object_type in ("/ObjStm", "/XRef") or doc.xref_object(xref) == "null":
+                        skipped.add(xref)
+                    else:
+                        mapping[xref] = next_number
+                        next_number += 1
+                for xref in ocg_xrefs:
+                    layers.setdefault(doc.xref_get_key(xref, "Name")[1], mapping[xref])
+                if ocg_xrefs and oc_properties is None:
+                    oc_properties = _renumber(doc.xref_get_key(catalog, "OCProperties")[1], mapping)
+
+                for xref in range(1, doc.xref_length()):
+                    if xref in skipped:
+                        continue
+                    text = _renumber(doc.xref_object(xref, compressed=True), mapping)
+                    if doc.xref_is_stream(xref):
+                        stream = doc.xref_stream_raw(xref) or b""
+                        if LENGTH.search(text):
+                            text = LENGTH.sub(f"/Length {len(stream)}", text, count=1)
+                        else:
+                            text = text[:-2] + f"/Length {len(stream)}>>"
+                        writer.write(mapping[xref], text, stream)
+                    else:
+                        writer.write(mapping[xref], text)
+                page_numbers.extend(mapping[doc.page_xref(i)] for i in range(doc.page_count))
+
+        kids = " ".join(f"{number} 0 R" for number in page_numbers)
+        writer.write(PAGES_NUMBER, f"<</Type/Pages/Kids[{kids}]/Count {len(page_numbers)}>>")
+        catalog = f"<</Type/Catalog/Pages {PAGES_NUMBER} 0 R"
+        if oc_properties is not None:
+            catalog += f"/OCProperties{oc_properties}"
+        writer.write(CATALOG_NUMBER, catalog + ">>")
+        writer.finish()
@@ -1,33 +1,79 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-import fitz  # PyMuPDF
-import re
+import json
+import multiprocessing
 import os
-from typing import List, Tuple
-import threading
+import queue
+import time
+
+from job_worker import JobWorker
+# Nothing here loads PyMuPDF; the engine is imported by the worker process
+from engine_settings import DEFAULT_OUTPUT_MODE, DEFAULT_SAVE_PROFILE, DEFAULT_SKU_MAP, OUTPUT_MODES, SAVE_PROFILES
+from run_progress import PROGRESS_STAGES, ProgressTracker, default_stage_costs, stage_costs_from_report
+from run_report import default_report_path
+
+# How often the main loop drains the worker's events, how many it handles
+# per drain, and how many log lines the log area keeps
+EVENT_POLL_MS = 100
+EVENT_BATCH = 1000
+LOG_MAX_LINES = 2000
+
+# If set, the GUI writes when it was about to create the Tk root, when its
+# window was drawn and when the worker had loaded the engine (time.time()
+# values, as JSON) to the file it names, then closes; the first is written
+# at once, so a run without a display still reports it. See
+# benchmarks/bench_startup.py
+STARTUP_PROBE_ENV = "PDF_GUI_STARTUP_PROBE"
+
+# A cancelled job stops at its next page or stage; one still running after
+# this long (e.g. in the middle of saving a large file) is killed
+CANCEL_TIMEOUT_MS = 15000
+
+# What the status line says during each progress stage
+STAGE_LABELS = {
+    "extract": "Reading pages",
+    "copy": "Copying pages",
+    "stamp": "Stamping labels",
+    "save": "Saving",
+    "concat": "Joining chunks",
+}
 
 class PDFProcessorGUI:
     def __init__(self, root):
         self.root = root
         self.root.title("Shiprocket Label Processor")
-        self.root.geometry("650x650")
+        self.root.geometry("650x700")
         self.root.resizable(True, True)
         
         # Variables
         self.input_file_path = tk.StringVar()
         self.output_file_path = tk.StringVar()
+        self.output_mode = tk.StringVar(value=DEFAULT_OUTPUT_MODE)
+        self.save_profile = tk.StringVar(value=DEFAULT_SAVE_PROFILE)
+        self.label_layer = tk.BooleanVar(value=False)
+        self.profile_run = tk.BooleanVar(value=False)
+        self.low_memory = tk.BooleanVar(value=False)
         self.processing = False
+        # Log lines, status changes and completion, applied to the widgets
+        # by the main loop only
+        self.events = queue.SimpleQueue()
+        # Started once the window is drawn, so the engine is imported while
+        # the user picks files
+        self.worker = JobWorker()
+        self.engine_ready_at = None
+        # Progress of the running job; stages are weighted by what they cost in the
+        # last run with the same save profile
+        self.tracker = None
+        self.stage_costs = {}
+        self.job_number = 0
         
         # SKU to product name mapping
-        self.sku_map = {
-            "TN0001": "OIL",
-            "TN0002": "Potli", 
-            "TN003": "Rollon",
-            "TS-NLT5-CZ47": "OIL",
-            "84-HNM4-WOND": "Potli",
-        }
+        self.sku_map = dict(DEFAULT_SKU_MAP)
         
         self.setup_ui()
+        self.root.after(EVENT_POLL_MS, self._drain_events)
+        self.root.after_idle(self.worker.start)
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
         
     def setup_ui(self):
         # Main frame
@@ -68,26 +114,50 @@ class PDFProcessorGUI:
         
         ttk.Button(output_frame, text="Browse", command=self.browse_output_file).grid(row=0, column=1)
         
-        # Process button
-        self.process_button = ttk.Button(main_frame, text="Process PDF", 
+        # Output options
+        ttk.Label(main_frame, text="Output Options:").grid(row=3, column=0, sticky=tk.W, pady=5)
+        
+        options_frame = ttk.Frame(main_frame)
+        options_frame.grid(row=3, column=1, columnspan=2, sticky=tk.W, pady=5)
+        
+        ttk.Label(options_frame, text="Mode:").grid(row=0, column=0, padx=(0, 5))
+        ttk.Combobox(options_frame, textvariable=self.output_mode, values=OUTPUT_MODES,
+                     state="readonly", width=8).grid(row=0, column=1, padx=(0, 15))
+        ttk.Label(options_frame, text="Save profile:").grid(row=0, column=2, padx=(0, 5))
+        ttk.Combobox(options_frame, textvariable=self.save_profile, values=list(SAVE_PROFILES),
+                     state="readonly", width=10).grid(row=0, column=3, padx=(0, 15))
+        ttk.Checkbutton(options_frame, text="Labels as layer",
+                        variable=self.label_layer).grid(row=0, column=4, padx=(0, 15))
+        ttk.Checkbutton(options_frame, text="Profile run",
+                        variable=self.profile_run).grid(row=0, column=5, padx=(0, 15))
+        ttk.Checkbutton(options_frame, text="Low memory",
+                        variable=self.low_memory).grid(row=0, column=6)
+        
+        # Process and cancel buttons
+        button_frame = ttk.Frame(main_frame)
+        button_frame.grid(row=4, column=0, columnspan=3, pady=20)
+        self.process_button = ttk.Button(button_frame, text="Process PDF", 
                                         command=self.process_pdf, style="Accent.TButton")
-        self.process_button.grid(row=3, column=0, columnspan=3, pady=20)
+        self.process_button.grid(row=0, column=0, padx=(0, 10))
+        self.cancel_button = ttk.Button(button_frame, text="Cancel", command=self.cancel_processing,
+                                        state="disabled")
+        self.cancel_button.grid(row=0, column=1)
         
         # Progress bar
-        self.progress = ttk.Progressbar(main_frame, mode='indeterminate')
-        self.progress.grid(row=4, column=0, columnspan=3, sticky=(tk.W, tk.E), pady=10)
+        self.progress = ttk.Progressbar(main_frame, mode='determinate', maximum=100)
+        self.progress.grid(row=5, column=0, columnspan=3, sticky=(tk.W, tk.E), pady=10)
         
         # Status label
         self.status_label = ttk.Label(main_frame, text="Ready to process", 
                                      font=("Arial", 10))
-        self.status_label.grid(row=5, column=0, columnspan=3, pady=10)
+        self.status_label.grid(row=6, column=0, columnspan=3, pady=10)
         
         # Log text area
         log_frame = ttk.LabelFrame(main_frame, text="Processing Log", padding="10")
-        log_frame.grid(row=6, column=0, columnspan=3, sticky=(tk.W, tk.E, tk.N, tk.S), pady=10)
+        log_frame.grid(row=7, column=0, columnspan=3, sticky=(tk.W, tk.E, tk.N, tk.S), pady=10)
         log_frame.columnconfigure(0, weight=1)
         log_frame.rowconfigure(0, weight=1)
-        main_frame.rowconfigure(6, weight=1)
+        main_frame.rowconfigure(7, weight=1)
         
         # Create text widget with scrollbar
         text_frame = ttk.Frame(log_frame)
@@ -106,7 +176,7 @@ class PDFProcessorGUI:
         ttk.Button(log_frame, text="Clear Log", command=self.clear_log).grid(row=1, column=0, pady=(10, 0))
         # Open PDF button (initially disabled)
         self.open_pdf_button = ttk.Button(main_frame, text="Open Converted PDF", command=self.open_converted_pdf, state="disabled")
-        self.open_pdf_button.grid(row=7, column=0, columnspan=3, pady=(10, 0))
+        self.open_pdf_button.grid(row=8, column=0, columnspan=3, pady=(10, 0))
         
     def browse_input_file(self):
         filename = filedialog.askopenfilename(
@@ -129,16 +199,84 @@ class PDFProcessorGUI:
             self.output_file_path.set(filename)
             
     def log_message(self, message):
-        self.log_text.insert(tk.END, f"{message}\n")
-        self.log_text.see(tk.END)
-        self.root.update_idletasks()
+        # Safe to call from any thread
+        self.events.put(("log", message))
         
     def clear_log(self):
         self.log_text.delete(1.0, tk.END)
         
     def update_status(self, message):
-        self.status_label.config(text=message)
-        self.root.update_idletasks()
+        self.events.put(("status", message))
+        
+    def _pump_worker(self):
+        for event in self.worker.poll(EVENT_BATCH):
+            if event[0] == "ready":
+                self.engine_ready_at = time.time()
+            elif event[0] == "log":
+                self.events.put(event)
+            elif event[0] == "progress":
+                if self.tracker is not None:
+                    self.tracker.update(*event[1:])
+            elif event[0] == "done":
+                summary = event[1]
+                if not summary.get("cached"):
+                    report = summary["report"]
+                    self.stage_costs[report["options"]["save_profile"]] = stage_costs_from_report(report)
+                self.events.put(("done", True, "Processing completed successfully!"))
+            elif event[0] == "cancelled":
+                self.events.put(("done", None, "Cancelled; the pages read so far are kept for the next run"))
+            elif event[0] == "error":
+                error_msg = f"Error during processing: {event[1]}"
+                self.log_message(error_msg)
+                self.events.put(("done", False, error_msg))
+        
+    def _drain_events(self):
+        self._pump_worker()
+        lines = []
+        status = done = None
+        for _ in range(EVENT_BATCH):
+            try:
+                event = self.events.get_nowait()
+            except queue.Empty:
+                break
+            if event[0] == "log":
+                lines.append(event[1])
+            elif event[0] == "status":
+                status = event[1]
+            else:
+                done = event[1:]
+                break
+        if lines:
+            self._append_log(lines)
+        if status is not None:
+            self.status_label.config(text=status)
+        if self.processing and self.tracker is not None and self.tracker.stage is not None:
+            self._show_progress()
+        if done is not None:
+            self._processing_complete(*done)
+        # Come back at once while a burst of events is still queued
+        self.root.after(EVENT_POLL_MS if self.events.empty() else 1, self._drain_events)
+        
+    def _show_progress(self):
+        tracker = self.tracker
+        self.progress["value"] = 100 * tracker.fraction()
+        text = f"{STAGE_LABELS.get(tracker.stage, tracker.stage)}: {tracker.done:,} of {tracker.total:,}"
+        rate = tracker.pages_per_sec()
+        if rate:
+            text += f" ({rate:,.0f}/s)"
+        eta = tracker.eta()
+        if eta is not None:
+            minutes, seconds = divmod(int(eta + 0.5), 60)
+            text += f", about {minutes}:{seconds:02d} left"
+        self.status_label.config(text=text)
+        
+    def _append_log(self, lines):
+        # One insert per batch, then drop the oldest lines past the limit
+        self.log_text.insert(tk.END, "\n".join(lines) + "\n")
+        excess = int(self.log_text.index("end-1c").split(".")[0]) - 1 - LOG_MAX_LINES
+        if excess > 0:
+            self.log_text.delete("1.0", f"{excess + 1}.0")
+        self.log_text.see(tk.END)
         
     def process_pdf(self):
         if self.processing:
@@ -159,231 +297,62 @@ class PDFProcessorGUI:
             messagebox.showerror("Error", "Input file does not exist.")
             return
             
-        # Start processing in a separate thread
+        # Imported here, as they load sqlite3 and friends the first window doesn't need
+        from page_cache import DEFAULT_PAGE_CACHE_PATH
+        from result_cache import DEFAULT_RESULT_CACHE_DIR
+        
+        # Start processing in the worker process
         self.processing = True
         self.process_button.config(state="disabled")
-        self.progress.start()
+        self.cancel_button.config(state="normal")
+        self.job_number += 1
+        self.progress["value"] = 0
+        save_profile = self.save_profile.get()
+        self.tracker = ProgressTracker(PROGRESS_STAGES if self.low_memory.get() else PROGRESS_STAGES[:-1],
+                                       self.stage_costs.get(save_profile) or default_stage_costs(save_profile))
         self.update_status("Processing...")
         self.clear_log()
         
-        thread = threading.Thread(target=self._process_pdf_thread, 
-                                args=(input_path, output_path))
-        thread.daemon = True
-        thread.start()
-        
-    def _process_pdf_thread(self, input_path, output_path):
-        try:
-            self.log_message("Starting PDF processing...")
-            
-            # Open the original PDF
-            doc = fitz.open(input_path)
-            self.log_message(f"Opened PDF with {len(doc)} pages")
-            
-            # Lists to store page numbers and their labels
-            marked_pages: List[Tuple[int, str]] = []
-            unmarked_pages: List[int] = []
-            # Dict to track skipped TN0001 and TS-NLT5-CZ47
-            skipped_special_skus = {"TN0001": [], "TS-NLT5-CZ47": []}
-            
-            # Stats counters
-            oil_counts = {1: 0, 2: 0, 3: 0, 'more': 0}
-            potli_counts = {1: 0, 2: 0, 3: 0, 'more': 0}
-            
-            # Process each page
-            for i, page in enumerate(doc):
-                text = page.get_text()
-                # Find all SKUs and their quantities
-                lines = text.splitlines()
-                sku_labels = []
-                for idx, line in enumerate(lines):
-                    sku = None
-                    qty = 1
-                    # Try to match SKU on one line
-                    sku_match = re.search(r'SKU:\s*([\w\-]+)', line)
-                    if sku_match and not sku_match.group(1).endswith('-'):
-                        sku = sku_match.group(1)
-                        # Try to get the next line for quantity
-                        if idx + 1 < len(lines):
-                            next_line = lines[idx + 1]
-                            qty_match = re.search(r'(\d+)', next_line)
-                            if qty_match:
-                                qty = int(qty_match.group(1))
-                        product_name = self.sku_map.get(sku, "Unknown Product")
-                        label_text = f"→ {product_name}x{qty}" if qty > 1 else f"→ {product_name}"
-                        sku_labels.append((sku, label_text))
-                        # Count stats for OIL and Potli
-                        if product_name == "OIL":
-                            if qty == 1:
-                                oil_counts[1] += 1
-                            elif qty == 2:
-                                oil_counts[2] += 1
-                            elif qty == 3:
-                                oil_counts[3] += 1
-                            elif qty > 3:
-                                oil_counts['more'] += 1
-                        elif product_name == "Potli":
-                            if qty == 1:
-                                potli_counts[1] += 1
-                            elif qty == 2:
-                                potli_counts[2] += 1
-                            elif qty == 3:
-                                potli_counts[3] += 1
-                            elif qty > 3:
-                                potli_counts['more'] += 1
-                    # Try to match SKU split across two lines (e.g. 'SKU: TS-NLT5-' and 'CZ47')
-                    elif "SKU:" in line:
-                        sku_prefix = line.strip().replace("SKU:", "").strip()
-                        sku_suffix = lines[idx + 1].strip()
-                        # Always ensure dash between prefix and suffix if not present
-                        if sku_prefix and sku_suffix and not sku_prefix.endswith("-") and not sku_suffix.startswith("-"):
-                            sku_full = sku_prefix + "-" + sku_suffix
-                        else:
-                            sku_full = sku_prefix + sku_suffix
-                        sku_full = sku_full.replace(" ", "")
-                        sku = sku_full
-                        # Quantity will be on the third line
-                        if idx + 2 < len(lines):
-                            qty_line = lines[idx + 2]
-                            qty_match = re.search(r'(\d+)', qty_line)
-                            if qty_match:
-                                qty = int(qty_match.group(1))
-                        product_name = self.sku_map.get(sku, "Unknown Product")
-                        label_text = f"→ {product_name}x{qty}" if qty > 1 else f"→ {product_name}"
-                        sku_labels.append((sku, label_text))
-                        # Count stats for OIL and Potli
-                        if product_name == "OIL":
-                            if qty == 1:
-                                oil_counts[1] += 1
-                            elif qty == 2:
-                                oil_counts[2] += 1
-                            elif qty == 3:
-                                oil_counts[3] += 1
-                            elif qty > 3:
-                                oil_counts['more'] += 1
-                        elif product_name == "Potli":
-                            if qty == 1:
-                                potli_counts[1] += 1
-                            elif qty == 2:
-                                potli_counts[2] += 1
-                            elif qty == 3:
-                                potli_counts[3] += 1
-                            elif qty > 3:
-                                potli_counts['more'] += 1
-                # Post-process sku_labels for TN0001 logic
-                final_labels = []
-                skus_on_page = [sku for sku, _ in sku_labels]
-                for idx, (sku, label_text) in enumerate(sku_labels):
-                    if sku == "TN0001":
-                        # Add TN0001 if qty > 1, or if there is another SKU on the page
-                        if "x" in label_text or len(skus_on_page) > 1:
-                            final_labels.append(label_text)
-                        else:
-                            skipped_special_skus["TN0001"].append({"page": i, "qty": 1, "skus_on_page": skus_on_page})
-                    elif sku == "TS-NLT5-CZ47":
-                        # Only add TS-NLT5-CZ47 if qty > 1
-                        if "x" in label_text:
-                            final_labels.append(label_text)
-                        else:
-                            skipped_special_skus["TS-NLT5-CZ47"].append({"page": i, "qty": 1, "skus_on_page": skus_on_page})
-                    else:
-                        final_labels.append(label_text)
-
-                if final_labels:
-                    label_text = " | ".join(final_labels)
-                    marked_pages.append((i, label_text))
-                else:
-                    unmarked_pages.append(i)
-            self.log_message(f"Found {len(marked_pages)} marked pages and {len(unmarked_pages)} unmarked pages")
-            self.log_message(f"OIL counts: pack of 1x={oil_counts[1]}, pack of 2x={oil_counts[2]}, pack of 3x={oil_counts[3]}, morex={oil_counts['more']}")
-            self.log_message(f"Potli counts: pack of 1x={potli_counts[1]}, pack of 2x={potli_counts[2]}, pack of 3x={potli_counts[3]}, morex={potli_counts['more']}")
-
-            # Group no-SKU page and its following SKU page together at the end
-            marked_dict = dict(marked_pages)
-            grouped_pairs = []
-            used_pages = set()
-            i = 0
-            def is_skipped(page_num):
-                for entry in skipped_special_skus["TN0001"] + skipped_special_skus["TS-NLT5-CZ47"]:
-                    if entry["page"] == page_num:
-                        return True
-                return False
-            while i < len(unmarked_pages):
-                page = unmarked_pages[i]
-                # Only group if neither page nor next page are in skipped_special_skus
-                if (page + 1) in marked_dict and not is_skipped(page) and not is_skipped(page + 1):
-                    # Group no-SKU page and its following SKU page
-                    grouped_pairs.append((page, page + 1))
-                    used_pages.add(page)
-                    used_pages.add(page + 1)
-                    i += 1  # skip next page as it's already grouped
-                i += 1
-            # Collect all marked pages not in grouped pairs
-            remaining_marked = [(i, label_text) for i, label_text in marked_pages if i not in used_pages]
-            # Collect all unmarked pages not in grouped pairs
-            remaining_unmarked = [i for i in unmarked_pages if i not in used_pages]
-
-            # Prepare final page order: unmarked pages at top, then all marked and grouped pairs at the bottom
-            final_page_order = []
-            # Add all remaining unmarked pages first
-            for i in remaining_unmarked:
-                final_page_order.append((i, None))
-            # Add all marked pages and grouped pairs at the bottom
-            marked_and_grouped = []
-            for i, label_text in remaining_marked:
-                marked_and_grouped.append((i, label_text))
-            for no_sku, sku_page in grouped_pairs:
-                marked_and_grouped.append((no_sku, None))
-                marked_and_grouped.append((sku_page, marked_dict[sku_page]))
-            final_page_order.extend(marked_and_grouped)
-
-            # For PDF creation, keep track of all pages in order, and which ones get labels
-            ordered_pages = [i for i, _ in final_page_order]
-            label_dict = {i: label_text for i, label_text in final_page_order if label_text is not None}
-
-            # Create a new PDF with reordered pages
-            new_doc = fitz.open()
-            
-            # Copy all pages in the new order, adding labels only to marked pages
-            self.log_message("Copying pages in new grouped order...Please Wait.. this will take some time")
-            for page_num in ordered_pages:
-                new_doc.insert_pdf(doc, from_page=page_num, to_page=page_num)
-                if page_num in label_dict:
-                    # Add label to the newly inserted page
-                    insert_point = fitz.Point(5, 250)
-                    new_doc[-1].insert_text(insert_point, label_dict[page_num], 
-                                           fontname="Courier-Bold", fontsize=12, color=(0, 0, 0))
-            
-            # Save with minimal optimization for speed
-            self.log_message("Saving output file...")
-            new_doc.save(output_path,
-                         deflate=False,    # Disable compression for speed
-                         garbage=1,        # Minimal garbage collection
-                         clean=True)       # cleaning but slow
-            
-            self.log_message(f"Successfully saved to: {output_path}")
-            
-            # Close both documents
-            doc.close()
-            new_doc.close()
-            
-            # Update UI on main thread
-            self.root.after(0, self._processing_complete, True, "Processing completed successfully!")
-            
-        except Exception as e:
-            error_msg = f"Error during processing: {str(e)}"
-            self.log_message(error_msg)
-            self.root.after(0, self._processing_complete, False, error_msg)
+        self.worker.submit(input_path=input_path, output_path=output_path, sku_map=self.sku_map,
+                           output_mode=self.output_mode.get(), save_profile=save_profile,
+                           label_layer="on" if self.label_layer.get() else None,
+                           report_path=default_report_path(output_path), profile=self.profile_run.get(),
+                           streaming=self.low_memory.get(), page_cache=DEFAULT_PAGE_CACHE_PATH,
+                           result_cache=DEFAULT_RESULT_CACHE_DIR)
             
+    def cancel_processing(self):
+        if not self.processing:
+            return
+        self.cancel_button.config(state="disabled")
+        self.worker.request_cancel()
+        self.tracker = None
+        self.update_status("Cancelling...")
+        self.root.after(CANCEL_TIMEOUT_MS, self._kill_job, self.job_number)
+        
+    def _kill_job(self, job_number):
+        # The job did not reach a page or stage boundary in time
+        if not self.processing or job_number != self.job_number:
+            return
+        self.worker.cancel()
+        self.log_message("Processing stopped")
+        self.events.put(("done", None, "Cancelled"))
+        
     def _processing_complete(self, success, message):
+        # success is None for a cancelled job
         self.processing = False
         self.process_button.config(state="normal")
-        self.progress.stop()
-        if success:
-            self.update_status("Processing completed successfully!")
+        self.cancel_button.config(state="disabled")
+        self.tracker = None
+        self.progress["value"] = 100 if success else 0
+        if success is None:
+            self.status_label.config(text=message)
+            self.open_pdf_button.config(state="disabled")
+        elif success:
+            self.status_label.config(text="Processing completed successfully!")
             messagebox.showinfo("Success", f"PDF processed successfully!\nOutput saved to:\n{self.output_file_path.get()}")
             self.open_pdf_button.config(state="normal")
         else:
-            self.update_status("Processing failed")
+            self.status_label.config(text="Processing failed")
             messagebox.showerror("Error", message)
             self.open_pdf_button.config(state="disabled")
             
@@ -397,9 +366,41 @@ class PDFProcessorGUI:
         else:
             messagebox.showerror("Error", "Converted PDF not found.")
 
+    def probe_startup(self, path, times):
+        
+        def drawn():
+            times.setdefault("window", time.time())
+        # The first Map event comes once the window is on screen; it is drawn at the next idle time
+        self.root.bind("<Map>", lambda event: self.root.after_idle(drawn), add="+")
+        
+        def check():
+            # Polled more often than the event loop does, for a sharper engine_ready time
+            self._pump_worker()
+            if self.engine_ready_at is not None:
+                times["engine_ready"] = self.engine_ready_at
+            if "window" in times and "engine_ready" in times:
+                with open(path, 'w', encoding='utf-8') as f:
+                    json.dump(times, f)
+                self.on_close()
+            else:
+                self.root.after(5, check)
+        self.root.after(5, check)
+        
+    def on_close(self):
+        self.worker.close()
+        self.root.destroy()
+
 def main():
+    multiprocessing.freeze_support()
+    probe_path = os.environ.get(STARTUP_PROBE_ENV)
+    if probe_path:
+        probe_times = {"tk": time.time()}
+        with open(probe_path, 'w', encoding='utf-8') as f:
+            json.dump(probe_times, f)
     root = tk.Tk()
     app = PDFProcessorGUI(root)
+    if probe_path:
+        app.probe_startup(probe_path, probe_times)
     root.mainloop()
 
 if __name__ == "__main__":
@@ -0,0 +1,46 @@
+# -*- mode: python ; coding: utf-8 -*-
+# Fast-start build, see build_windows.py --fast-start
+import os
+
+a = Analysis(
+    ['pdf_gui.py'],
+    pathex=[],
+    binaries=[],
+    datas=[],
+    hiddenimports=[],
+    hookspath=[],
+    hooksconfig={},
+    runtime_hooks=[],
+    excludes=['PIL', 'numpy', 'pandas', 'matplotlib', 'unittest', 'doctest', 'pydoc', 'pdb', 'lib2to3', 'setuptools', 'pip', 'xmlrpc', 'curses', 'tkinter.tix', 'test'],
+    noarchive=False,
+    optimize=2,
+)
+pyz = PYZ(a.pure)
+
+exe = EXE(
+    pyz,
+    a.scripts,
+    [],
+    exclude_binaries=True,
+    name='PDF_Label_Processor',
+    debug=False,
+    bootloader_ignore_signals=False,
+    strip=False,
+    upx=False,
+    console=False,
+    disable_windowed_traceback=False,
+    argv_emulation=False,
+    target_arch=None,
+    codesign_identity=None,
+    entitlements_file=None,
+    icon='icon.ico' if os.path.exists('icon.ico') else None,
+)
+coll = COLLECT(
+    exe,
+    a.binaries,
+    a.datas,
+    strip=False,
+    upx=False,
+    upx_exclude=[],
+    name='PDF_Label_Processor',
+)
@@ -0,0 +1,97 @@
+"""
+Result Cache
+Keeps the outputs and run summaries of recent runs, keyed by a hash of
+the input file's bytes and every setting that affects the output, so
+processing an identical manifest again just copies the earlier output.
+Least recently used results are dropped beyond a count and size limit.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from typing import Dict, List, Optional, Tuple
+
+DEFAULT_RESULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".shiprocket_labels", "results")
+
+# Results kept, and their total size
+DEFAULT_MAX_ENTRIES = 20
+DEFAULT_MAX_BYTES = 500 * 1024 * 1024
+
+OUTPUT_NAME = "output.pdf"
+SUMMARY_NAME = "summary.json"
+
+HASH_BLOCK = 1024 * 1024
+
+
+def run_key(input_path: str, config: Dict) -> str:
+    """Hash the input file's bytes together with the JSON-serializable config."""
+    digest = hashlib.sha256(json.dumps(config, sort_keys=True).encode("utf-8"))
+    with open(input_path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """One directory per result, holding the output PDF and the run summary."""
+
+    def __init__(self, directory: str = DEFAULT_RESULT_CACHE_DIR, max_entries: int = DEFAULT_MAX_ENTRIES,
+                 max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def get(self, key: str, output_path: str) -> Optional[Dict]:
+        """
+        Copy the cached output for `key` to output_path and return the
+        summary of the run that made it, or return None on a miss.
+        """
+        entry = os.path.join(self.directory, key)
+        try:
+            with open(os.path.join(entry, SUMMARY_NAME), 'r', encoding='utf-8') as f:
+                summary = json.load(f)
+            shutil.copyfile(os.path.join(entry, OUTPUT_NAME), output_path)
+        except (OSError, ValueError):
+            return None
+        # The directory's modification time is its last use
+        os.utime(entry)
+        return summary
+
+    def put(self, key: str, output_path: str, summary: Dict):
+        """Store a copy of output_path and its run summary, then evict old results."""
+        tmp_dir = tempfile.mkdtemp(prefix=".tmp_", dir=self.directory)
+        try:
+            shutil.copyfile(output_path, os.path.join(tmp_dir, OUTPUT_NAME))
+            with open(os.path.join(tmp_dir, SUMMARY_NAME), 'w', encoding='utf-8') as f:
+                json.dump(summary, f, indent=2)
+            os.replace(tmp_dir, os.path.join(self.directory, key))
+        except OSError:
+            # Another process stored the same result first, or the disk is full
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        self.evict()
+
+    def _entries(self) -> List[Tuple[float, int, str]]:
+        entries = []
+        for name in os.listdir(self.directory):
+            entry = os.path.join(self.directory, name)
+            if name.startswith(".tmp_") or not os.path.isdir(entry):
+                continue
+            try:
+                size = sum(os.path.getsize(os.path.join(entry, f)) for f in os.listdir(entry))
+                entries.append((os.path.getmtime(entry), size, entry))
+            except OSError:
+                continue
+        return entries
+
+    def evict(self):
+        """Drop least recently used results beyond max_entries or max_bytes."""
+        entries = sorted(self._entries(), reverse=True)
+        total = 0
+        for n, (_, size, entry) in enumerate(entries):
+            total += size
+            if n >= self.max_entries or total > self.max_bytes:
+                shutil.rmtree(entry, ignore_errors=True)
+
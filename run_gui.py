@@ -6,19 +6,15 @@ This script launches the GUI application for processing PDF files.
 
 import sys
 import subprocess
+from importlib.util import find_spec
 
 def check_dependencies():
-    """Check if required packages are installed."""
+    """Check if required packages are installed, without importing them."""
     required_packages = ['fitz', 'tkinter']
     missing_packages = []
     
     for package in required_packages:
-        try:
-            if package == 'fitz':
-                import fitz
-            elif package == 'tkinter':
-                import tkinter
-        except ImportError:
+        if find_spec(package) is None:
             missing_packages.append(package)
     
     return missing_packages
@@ -0,0 +1,107 @@
+"""
+Run Profiler
+Wraps a processing run in cProfile and tracemalloc and writes the results
+next to the output PDF: out.pdf -> out_profile.prof (load with pstats or
+snakeviz) and out_profile.txt (top CPU functions and allocation sites).
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import tracemalloc
+from contextlib import contextmanager
+from typing import Iterator, List, Optional
+
+PROFILE_SUFFIX = "_profile.prof"
+SUMMARY_SUFFIX = "_profile.txt"
+
+# Entries per table in the summary
+TOP_FUNCTIONS = 25
+TOP_ALLOCATIONS = 15
+# Stack depth kept per allocation; deeper means slower tracing
+TRACE_FRAMES = 8
+
+# Largest snapshot seen by checkpoint() during the active profile_run
+_largest: Optional[tracemalloc.Snapshot] = None
+_largest_size = -1
+_active = False
+
+
+def checkpoint():
+    """
+    Remember what is allocated now if it is more than at any earlier
+    checkpoint. Call it where a run holds the most memory; it does nothing
+    unless profile_run is active.
+    """
+    global _largest, _largest_size
+    if not _active:
+        return
+    size, _ = tracemalloc.get_traced_memory()
+    if size > _largest_size:
+        _largest, _largest_size = tracemalloc.take_snapshot(), size
+
+
+def profile_paths(output_path: str) -> List[str]:
+    """The .prof and summary paths for an output PDF."""
+    base = os.path.splitext(output_path)[0]
+    return [base + PROFILE_SUFFIX, base + SUMMARY_SUFFIX]
+
+
+def _cpu_tables(profiler: cProfile.Profile) -> str:
+    out = io.StringIO()
+    stats = pstats.Stats(profiler, stream=out)
+    stats.strip_dirs()
+    out.write(f"Top {TOP_FUNCTIONS} functions by own time\n")
+    stats.sort_stats("tottime").print_stats(TOP_FUNCTIONS)
+    out.write(f"\nTop {TOP_FUNCTIONS} functions by cumulative time\n")
+    stats.sort_stats("cumulative").print_stats(TOP_FUNCTIONS)
+    return out.getvalue()
+
+
+def _allocation_table(snapshot: tracemalloc.Snapshot, size: int, peak: int) -> str:
+    lines = [f"Peak traced memory: {peak / 1e6:.1f} MB (Python allocations only, not MuPDF's)",
+             f"Top {TOP_ALLOCATIONS} allocation sites at the largest checkpoint ({size / 1e6:.1f} MB held):"]
+    snapshot = snapshot.filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    ])
+    for n, stat in enumerate(snapshot.statistics("lineno")[:TOP_ALLOCATIONS], 1):
+        frame = stat.traceback[0]
+        lines.append(f"{n:3}. {frame.filename}:{frame.lineno}: {stat.size / 1e3:.1f} kB in {stat.count} blocks")
+    return "\n".join(lines) + "\n"
+
+
+@contextmanager
+def profile_run(output_path: str) -> Iterator[List[str]]:
+    """
+    Profile the body of the with-block. Yields the list of files written,
+    which is filled in when the block exits (also when it raises).
+    Only the calling process is profiled, not extraction worker processes.
+    """
+    global _active, _largest, _largest_size
+    written: List[str] = []
+    prof_path, summary_path = profile_paths(output_path)
+    started_tracing = not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start(TRACE_FRAMES)
+    tracemalloc.reset_peak()
+    _active, _largest, _largest_size = True, None, -1
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield written
+    finally:
+        profiler.disable()
+        checkpoint()
+        _, peak = tracemalloc.get_traced_memory()
+        snapshot, size = _largest, _largest_size
+        _active, _largest = False, None
+        if started_tracing:
+            tracemalloc.stop()
+        profiler.dump_stats(prof_path)
+        with open(summary_path, 'w', encoding='utf-8') as f:
+            f.write(_cpu_tables(profiler))
+            f.write("\n")
+            f.write(_allocation_table(snapshot, size, peak))
+        written.extend([prof_path, summary_path])
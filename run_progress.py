@@ -0,0 +1,165 @@
+"""
+Run Progress
+Progress events of a processing run: the engine reports (stage, done,
+total) as pages go through each stage, and ProgressTracker turns them into
+an overall fraction, the current pages/sec and an ETA, with every stage
+weighted by what it costs per page. Progress events double as the points
+where a run can be cancelled.
+"""
+
+import time
+from typing import Callable, Dict, Optional, Sequence
+
+ProgressFunc = Callable[[str, int, int], None]
+CancelFunc = Callable[[], bool]
+
+# Stages that report progress, in pipeline order; extract covers parse and
+# classify too, and concat only happens in streaming runs
+PROGRESS_STAGES = ("extract", "copy", "stamp", "save", "concat")
+
+# Seconds per 1000 pages of each stage, measured on a generated 2000 page
+# manifest (see benchmarks/README.md); replaced by the last run's report
+DEFAULT_STAGE_COSTS = {"extract": 0.5, "copy": 1.3, "stamp": 0.9, "save": 0.04, "concat": 0.35}
+# The save above is the default "fast" profile's; the others are scaled by
+# the 3000 page save times in benchmarks/README.md
+SAVE_PROFILE_COSTS = {"fast": 0.04, "balanced": 3.4, "compact": 15.0}
+
+# Least time between two events passed on by ProgressReporter
+REPORT_INTERVAL = 0.1
+
+# A stage that has not reported progress for a while is assumed to be this
+# far through at most, when estimating it from its expected time
+MAX_ESTIMATED_FRACTION = 0.95
+
+
+class RunCancelled(Exception):
+    """Raised inside a run whose cancelled() check returned True."""
+
+
+class ProgressReporter:
+    """
+    Passes progress events on to `callback`, at most one every `interval`
+    seconds except for the first and last of each stage, so that per-page
+    reporting stays cheap even when the callback writes to a pipe. With
+    `cancelled`, every event but the last of a stage raises RunCancelled
+    once it returns True, so a stage that has finished (such as the save)
+    is never thrown away.
+    """
+
+    def __init__(self, callback: Optional[ProgressFunc] = None, interval: float = REPORT_INTERVAL,
+                 cancelled: Optional[CancelFunc] = None):
+        self.callback = callback
+        self.interval = interval
+        self.cancelled = cancelled
+        self._stage = None
+        self._last = 0.0
+
+    def __call__(self, stage: str, done: int, total: int):
+        if self.cancelled is not None and done < total and self.cancelled():
+            raise RunCancelled(f"Cancelled while in stage {stage}")
+        if self.callback is None:
+            return
+        now = time.perf_counter()
+        if stage != self._stage or done >= total or now - self._last >= self.interval:
+            self._stage, self._last = stage, now
+            self.callback(stage, done, total)
+
+
+def default_stage_costs(save_profile: str) -> Dict[str, float]:
+    """DEFAULT_STAGE_COSTS with the save cost of `save_profile`."""
+    return dict(DEFAULT_STAGE_COSTS, save=SAVE_PROFILE_COSTS.get(save_profile, DEFAULT_STAGE_COSTS["save"]))
+
+
+def stage_costs_from_report(report: Dict) -> Dict[str, float]:
+    """Seconds per 1000 pages of each progress stage, from a RunReport dict."""
+    pages = report.get("pages") or 0
+    if not pages:
+        return dict(DEFAULT_STAGE_COSTS)
+    stages = {stage["stage"]: stage for stage in report.get("stages", [])}
+    seconds = {name: stage["seconds"] for name, stage in stages.items()}
+    # Pages kept from an earlier run are left out of extract and parse, so
+    # those are scaled up from the pages actually read
+    read_pages = stages.get("extract", {}).get("pages", pages)
+    if read_pages:
+        extract = (seconds.get("extract", 0.0) + seconds.get("parse", 0.0)) * pages / read_pages
+    else:
+        # Every page was kept: nothing measured extraction
+        extract = DEFAULT_STAGE_COSTS["extract"] * pages / 1000
+    costs = {
+        "extract": extract + seconds.get("classify", 0.0),
+        "copy": seconds.get("copy", 0.0),
+        "stamp": seconds.get("stamp", 0.0),
+        "save": seconds.get("save", 0.0),
+        "concat": seconds.get("concat", 0.0),
+    }
+    # Streaming runs are the only ones that measure concat
+    if "concat" not in seconds:
+        costs["concat"] = DEFAULT_STAGE_COSTS["concat"] * pages / 1000
+    return {stage: cost * 1000 / pages for stage, cost in costs.items()}
+
+
+class ProgressTracker:
+    """
+    Overall progress of one run from its progress events. Each stage counts
+    by its share of the expected cost; streaming runs interleave copy, stamp
+    and save chunk by chunk, so every stage keeps its own fraction. A stage
+    that has started but reported no pages yet (save writes the file in one
+    call) is estimated from how long it has taken against its expected time.
+    """
+
+    def __init__(self, stages: Sequence[str] = PROGRESS_STAGES[:-1],
+                 stage_costs: Optional[Dict[str, float]] = None):
+        costs = stage_costs or DEFAULT_STAGE_COSTS
+        self.stages = list(stages)
+        total_cost = sum(costs.get(stage, 0.0) for stage in self.stages) or 1.0
+        self.weights = {stage: costs.get(stage, 0.0) / total_cost for stage in self.stages}
+        self.started = time.perf_counter()
+        self.stage: Optional[str] = None
+        self.done = self.total = 0
+        self._fractions: Dict[str, float] = {}
+        self._stage_started: Dict[str, float] = {}
+
+    def update(self, stage: str, done: int, total: int):
+        if stage not in self.weights:
+            return
+        # Stages run in order, so any before this one that never reported were skipped
+        for earlier in self.stages[:self.stages.index(stage)]:
+            self._fractions.setdefault(earlier, 1.0)
+        self._stage_started.setdefault(stage, time.perf_counter())
+        fraction = done / total if total else 0.0
+        self._fractions[stage] = max(self._fractions.get(stage, 0.0), fraction)
+        self.stage, self.done, self.total = stage, done, total
+
+    def _estimated(self, now: float) -> float:
+        # Extra fraction for a current stage that has not reported any pages
+        if self.stage is None or self._fractions[self.stage] > 0.0:
+            return 0.0
+        stage_started = self._stage_started[self.stage]
+        finished = sum(self.weights[stage] * fraction for stage, fraction in self._fractions.items())
+        if not finished:
+            return 0.0
+        # What the stage should take, at the speed of the stages before it
+        expected = (stage_started - self.started) / finished * self.weights[self.stage]
+        if not expected:
+            return 0.0
+        return self.weights[self.stage] * min(MAX_ESTIMATED_FRACTION, (now - stage_started) / expected)
+
+    def fraction(self) -> float:
+        """Overall fraction done, 0 to 1."""
+        done = sum(self.weights[stage] * fraction for stage, fraction in self._fractions.items())
+        return min(1.0, done + self._estimated(time.perf_counter()))
+
+    def pages_per_sec(self) -> Optional[float]:
+        """Pages per second through the current stage since it started."""
+        if self.stage is None or not self.done:
+            return None
+        elapsed = time.perf_counter() - self._stage_started[self.stage]
+        return self.done / elapsed if elapsed > 0 else None
+
+    def eta(self) -> Optional[float]:
+        """Estimated seconds left, once there is enough progress to tell."""
+        fraction = self.fraction()
+        if fraction < 0.01:
+            return None
+        elapsed = time.perf_counter() - self.started
+        return elapsed / fraction * (1.0 - fraction)
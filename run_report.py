@@ -0,0 +1,114 @@
+"""
+Run Report
+Wall time and throughput of each processing stage (open, extract, parse,
+classify, copy, stamp, save and, for streaming runs, concat) for one run,
+as log lines and as JSON.
+"""
+
+import json
+import os
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+REPORT_SUFFIX = "_report.json"
+
+# Stages in pipeline order, as they appear in reports
+STAGES = ("open", "extract", "parse", "classify", "copy", "stamp", "save", "concat")
+
+
+def default_report_path(output_path: str) -> str:
+    """The run report sits next to the output PDF: out.pdf -> out_report.json."""
+    return os.path.splitext(output_path)[0] + REPORT_SUFFIX
+
+
+class RunReport:
+    """Collects stage timings for one processed manifest."""
+
+    def __init__(self, input_path: str = "", output_path: str = "", options: Optional[Dict] = None):
+        self.input_path = input_path
+        self.output_path = output_path
+        self.options = dict(options or {})
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self.total_seconds = 0.0
+        self.pages = 0
+        self.bytes_written = 0
+        self.stages: Dict[str, Dict] = {}
+
+    def add(self, name: str, seconds: float, pages: int = 0, **extra):
+        """Record time spent in a stage; repeated calls for one stage add up."""
+        stage = self.stages.setdefault(name, {"seconds": 0.0, "pages": 0})
+        stage["seconds"] += seconds
+        stage["pages"] = max(stage["pages"], pages)
+        stage.update(extra)
+
+    @contextmanager
+    def stage(self, name: str, pages: int = 0, **extra) -> Iterator[None]:
+        """Time the body of a with-block as stage `name`."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start, pages, **extra)
+
+    def finish(self, pages: int, bytes_written: int):
+        self.total_seconds = time.perf_counter() - self._start
+        self.pages = pages
+        self.bytes_written = bytes_written
+
+    def _ordered_stages(self) -> List[str]:
+        known = [name for name in STAGES if name in self.stages]
+        return known + [name for name in self.stages if name not in STAGES]
+
+    def to_dict(self) -> Dict:
+        stages = []
+        for name in self._ordered_stages():
+            stage = dict({"stage": name}, **self.stages[name])
+            seconds = stage["seconds"]
+            stage["pages_per_sec"] = round(stage["pages"] / seconds, 1) if seconds and stage["pages"] else None
+            stage["seconds"] = round(seconds, 6)
+            stages.append(stage)
+        return {
+            "input": self.input_path,
+            "output": self.output_path,
+            "started_at": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started_at)),
+            "options": self.options,
+            "pages": self.pages,
+            "total_seconds": round(self.total_seconds, 6),
+            "pages_per_sec": round(self.pages / self.total_seconds, 1) if self.total_seconds else None,
+            "bytes_written": self.bytes_written,
+            "stages": stages,
+        }
+
+    def log_lines(self) -> List[str]:
+        """Human readable timings, one line per stage plus a total."""
+        lines = ["Stage timings:"]
+        for name in self._ordered_stages():
+            stage = self.stages[name]
+            line = f"  {name:<9}{stage['seconds']:8.3f} s"
+            if stage["pages"] and stage["seconds"]:
+                line += f"  {stage['pages']} pages, {stage['pages'] / stage['seconds']:.0f} pages/s"
+            if stage.get("workers"):
+                line += f" (summed over {stage['workers']} workers)"
+            if stage.get("cached_pages"):
+                line += f", {stage['cached_pages']} from the page cache"
+            if stage.get("kept_pages"):
+                line += f", {stage['kept_pages']} kept from an earlier run"
+            if stage.get("bytes_written"):
+                line += f"  {stage['bytes_written'] / 1e6:.2f} MB written"
+            lines.append(line)
+        rate = f", {self.pages / self.total_seconds:.0f} pages/s" if self.total_seconds else ""
+        lines.append(f"  {'total':<9}{self.total_seconds:8.3f} s  {self.pages} pages{rate}")
+        return lines
+
+    def write(self, path: str):
+        write_report(self.to_dict(), path)
+
+
+def write_report(report: Dict, path: str):
+    """Write a report dict (see RunReport.to_dict) as JSON, replacing `path` atomically."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    os.replace(tmp_path, path)
@@ -0,0 +1,113 @@
+"""
+Label Engine Tests
+Pins the page parser against the original one, the content stream reader
+on SKU anchors drawn in pieces, and concat_pdfs on real output. Run from
+the repository root:
+
+    python -m pytest -q tests
+"""
+
+import os
+import sys
+
+import fitz  # PyMuPDF
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+from bench_parser import legacy_parse_page_text  # noqa: E402
+from content_stream import scan_text_lines  # noqa: E402
+from generate_manifest import generate_pages, regression_pages, write_pages  # noqa: E402
+from label_engine import SKU_ANCHOR, parse_page_text, read_page_skus  # noqa: E402
+from pdf_concat import concat_pdfs  # noqa: E402
+
+ANCHOR = SKU_ANCHOR.encode("latin-1")
+SAMPLE_MANIFESTS = ["input.pdf", "input2.pdf", "input3.pdf"]
+
+
+@pytest.mark.parametrize("name", SAMPLE_MANIFESTS)
+def test_parse_page_text_matches_legacy_parser(name):
+    path = os.path.join(ROOT, name)
+    if not os.path.exists(path):
+        pytest.skip(f"{name} is not in this checkout")
+    with fitz.open(path) as doc:
+        texts = [page.get_text() for page in doc]
+    assert [parse_page_text(t) for t in texts] == [legacy_parse_page_text(t) for t in texts]
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("SKU: TN0001\n2\nSKU: TS-NLT5-\nCZ47\n3", [("TN0001", 2), ("TS-NLT5-CZ47", 3)]),
+    ("SKU: TN0001", [("TN0001", 1)]),
+    ("Qty\nSKU: TN0001\n1\nShip To\nSKU: TN0002\n1", [("TN0001", 1)]),
+])
+def test_parse_page_text(text, expected):
+    assert parse_page_text(text) == expected
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Description\nSKU: TS-NLT5-", [("TS-NLT5-", 1)]),
+    ("Description\nSKU:", [("", 1)]),
+])
+def test_parse_page_text_trailing_anchor(text, expected):
+    # The original parser read the line after a split SKU unchecked and
+    # raised IndexError when "SKU:" ended the page text
+    with pytest.raises(IndexError):
+        legacy_parse_page_text(text)
+    assert parse_page_text(text) == expected
+
+
+@pytest.fixture
+def generated_pdf(tmp_path):
+    path = str(tmp_path / "generated.pdf")
+    expected = write_pages(path, generate_pages(6, {"TN0001": 1, "TS-NLT5-CZ47": 1}, {1: 1, 2: 1},
+                                                split_share=1.0, multi_share=0.5, continued_share=0.3,
+                                                seed=1))
+    return path, expected
+
+
+@pytest.fixture
+def regression_pdf(tmp_path):
+    path = str(tmp_path / "regression.pdf")
+    return path, write_pages(path, regression_pages())
+
+
+def test_scan_text_lines_split_sku(generated_pdf):
+    path, expected = generated_pdf
+    with fitz.open(path) as doc:
+        for page, page_skus in zip(doc, expected):
+            lines = scan_text_lines(page, ANCHOR)
+            assert lines is not None
+            assert parse_page_text("\n".join(lines)) == page_skus
+            if any(sku == "TS-NLT5-CZ47" for sku, _ in page_skus):
+                assert lines[:2] == ["SKU: TS-NLT5-", "CZ47"]
+
+
+@pytest.mark.parametrize("index", [0, 1, 2], ids=["split-strings", "split-text-objects", "kerned"])
+def test_scan_text_lines_gives_up_on_pieced_anchors(regression_pdf, index):
+    # None sends the page to MuPDF's text extraction, which reads it right
+    path, expected = regression_pdf
+    with fitz.open(path) as doc:
+        page = doc[index]
+        assert scan_text_lines(page, ANCHOR) is None
+        assert read_page_skus(page, "content") == expected[index]
+
+
+def _text_pdf(path, texts):
+    with fitz.open() as doc:
+        for text in texts:
+            doc.new_page().insert_text((72, 72), text)
+        doc.save(path)
+
+
+def test_concat_pdfs(tmp_path):
+    paths = [str(tmp_path / "a.pdf"), str(tmp_path / "b.pdf")]
+    _text_pdf(paths[0], ["first 1", "first 2"])
+    _text_pdf(paths[1], ["second 1", "second 2", "second 3"])
+    output = str(tmp_path / "joined.pdf")
+    concat_pdfs(paths, output)
+    with fitz.open(output) as doc:
+        assert doc.page_count == 5
+        assert [page.get_text().strip() for page in doc] == [
+            "first 1", "first 2", "second 1", "second 2", "second 3"]